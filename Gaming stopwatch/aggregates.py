@@ -0,0 +1,98 @@
+import bisect
+import heapq
+import math
+from array import array
+
+
+class GroupStats:
+    """Count, total and (unless percentiles=False) sorted durations for one
+    group of sessions"""
+
+    __slots__ = ('count', 'total', 'durations')
+
+    def __init__(self, percentiles=True):
+        self.count = 0
+        self.total = 0.0
+        self.durations = array('d') if percentiles else None  # kept sorted
+
+    def add(self, duration):
+        self.count += 1
+        self.total += duration
+        if self.durations is not None:
+            bisect.insort(self.durations, duration)
+
+    def percentile(self, p):
+        """Nearest-rank percentile of the durations (p from 0 to 100)"""
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(p / 100 * self.count))
+        return self.durations[min(rank, self.count) - 1]
+
+
+class HistoryAggregates:
+    """Totals and counts overall, per task and per day, and duration
+    percentiles overall and per task
+
+    Built once from the stored history, then updated one session at a time,
+    so the history window never has to rescan every session.
+    """
+
+    def __init__(self):
+        self.overall = GroupStats()
+        self.by_task = {}
+        self.by_day = {}
+
+    @classmethod
+    def build(cls, rows):
+        """Build from (task, day, duration) tuples, sorting each group once"""
+        aggregates = cls()
+        for task, day, duration in rows:
+            overall, task_stats, day_stats = aggregates._groups(task, day)
+            for stats in (overall, task_stats):
+                stats.count += 1
+                stats.total += duration
+                stats.durations.append(duration)
+            day_stats.count += 1
+            day_stats.total += duration
+        for stats in [aggregates.overall, *aggregates.by_task.values()]:
+            stats.durations = array('d', sorted(stats.durations))
+        return aggregates
+
+    def add(self, task, day, duration):
+        """Fold in one new session"""
+        for stats in self._groups(task, day):
+            stats.add(duration)
+
+    def clear(self):
+        self.overall = GroupStats()
+        self.by_task.clear()
+        self.by_day.clear()
+
+    def totals_by_task(self, limit=None):
+        """(task, sessions, total seconds) tuples, most time first"""
+        rows = ((task, stats.count, stats.total) for task, stats in self.by_task.items())
+        if limit is not None:
+            return heapq.nlargest(limit, rows, key=lambda row: row[2])
+        return sorted(rows, key=lambda row: -row[2])
+
+    def totals_by_day(self, limit=None):
+        """(day, sessions, total seconds) tuples, newest day first"""
+        if limit is not None:
+            days = heapq.nlargest(limit, self.by_day)
+        else:
+            days = sorted(self.by_day, reverse=True)
+        return [(day, self.by_day[day].count, self.by_day[day].total) for day in days]
+
+    def percentile(self, p, task=None):
+        """Duration percentile overall or for one task"""
+        stats = self.overall if task is None else self.by_task.get(task)
+        return stats.percentile(p) if stats else 0.0
+
+    def _groups(self, task, day):
+        task_stats = self.by_task.get(task)
+        if task_stats is None:
+            task_stats = self.by_task[task] = GroupStats()
+        day_stats = self.by_day.get(day)
+        if day_stats is None:
+            day_stats = self.by_day[day] = GroupStats(percentiles=False)
+        return (self.overall, task_stats, day_stats)
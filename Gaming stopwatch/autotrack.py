@@ -0,0 +1,102 @@
+import queue
+import threading
+import time
+
+
+class AutoTracker:
+    """Start timers when watched apps appear and stop them when they exit
+
+    New apps come from the scanner's diffs. Exits are detected by polling
+    only the PIDs being tracked (no full process scan), and the end time
+    is taken halfway between the last check that saw the process alive and
+    the first one that didn't.
+
+    Apps like Discord or Chrome run several processes that come and go.
+    When the tracked one exits, `instances(name)` (the other processes the
+    last scan found for the app) is checked, and tracking moves to one that
+    is still alive; only when none is left has the app exited.
+    """
+
+    def __init__(self, is_alive, is_watched, interval=0.5, clock=time.perf_counter_ns, instances=None):
+        self.is_alive = is_alive
+        self.is_watched = is_watched
+        self.instances = instances
+        self.interval = interval
+        self.clock = clock
+        self.exits = queue.Queue()  # (app name, exit time on `clock`)
+        self._tracked = {}  # app name -> [info, last time seen alive]
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="auto-tracker", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+
+    def on_diff(self, diff):
+        """Take a scanner diff; return the watched apps that just appeared"""
+        appeared = []
+        now = self.clock()
+        with self._lock:
+            for name, info in diff.added.items():
+                if name in self._tracked:
+                    # Same app, different process (the first one exited)
+                    self._tracked[name] = [info, now]
+                elif name in diff.republished:
+                    continue  # not a new launch, e.g. its timer was stopped by hand
+                elif self.is_watched(name):
+                    self._tracked[name] = [info, now]
+                    appeared.append(name)
+        return appeared
+
+    def forget(self, name):
+        """Stop watching an app (e.g. its timer was stopped by hand)"""
+        with self._lock:
+            self._tracked.pop(name, None)
+
+    def drain(self):
+        """Return (app name, exit time) pairs detected since the last call"""
+        exits = []
+        while True:
+            try:
+                exits.append(self.exits.get_nowait())
+            except queue.Empty:
+                return exits
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            with self._lock:
+                tracked = list(self._tracked.items())
+            for name, (info, last_seen) in tracked:
+                alive = self._alive(info)
+                replacement = None if alive else self._other_live_instance(name, info)
+                now = self.clock()
+                with self._lock:
+                    entry = self._tracked.get(name)
+                    if entry is None or entry[0] is not info:
+                        continue  # replaced or forgotten meanwhile
+                    if alive or replacement is not None:
+                        if replacement is not None:
+                            entry[0] = replacement
+                        entry[1] = now
+                        continue
+                    del self._tracked[name]
+                self.exits.put((name, last_seen + (now - last_seen) // 2))
+
+    def _alive(self, info):
+        try:
+            return self.is_alive(info)
+        except Exception:
+            return True  # can't tell; check again next time
+
+    def _other_live_instance(self, name, info):
+        """Another running process of the same app, or None"""
+        if self.instances is None:
+            return None
+        key = (info.get('pid'), info.get('create_time'))
+        for other in self.instances(name):
+            if (other.get('pid'), other.get('create_time')) != key and self._alive(other):
+                return other
+        return None
@@ -0,0 +1,106 @@
+"""Compare AppClassifier with the old linear keyword/path scans.
+
+Run from the "Gaming stopwatch" folder:  python benchmarks/bench_classifier.py
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from classifier import APP_PATHS, SYSTEM_PATHS, AppClassifier
+
+APP_KEYWORDS = [
+    'game', 'steam', 'epic', 'origin', 'uplay', 'battle',
+    'minecraft', 'roblox', 'fortnite', 'valorant', 'league',
+    'dota', 'csgo', 'overwatch', 'apex', 'gta', 'pubg',
+    'cod', 'warzone', 'fifa', 'nba', 'madden', 'rocket',
+    'discord', 'obs', 'twitch', 'code', 'studio', 'chrome',
+    'firefox', 'edge', 'excel', 'word', 'powerpoint', 'photoshop',
+    'spotify', 'slack', 'teams', 'zoom', 'blender', 'unity',
+    'rider', 'pycharm', 'intellij', 'eclipse', 'notepad++'
+]
+
+EXCLUDED_PROCESSES = [
+    'svchost', 'system', 'registry', 'smss', 'csrss', 'wininit',
+    'services', 'lsass', 'winlogon', 'dwm', 'conhost', 'fontdrvhost',
+    'taskhostw', 'sihost', 'ctfmon', 'explorer', 'searchhost',
+    'runtimebroker', 'dllhost', 'spoolsv', 'audiodg', 'python', 'pythonw'
+]
+
+DIRS = [
+    'C:\\Windows\\System32\\', 'C:\\Windows\\SysWOW64\\',
+    'C:\\Program Files\\', 'C:\\Program Files (x86)\\Steam\\steamapps\\common\\',
+    'C:\\Users\\me\\AppData\\Local\\', 'D:\\Tools\\', 'C:\\ProgramData\\'
+]
+
+
+def legacy_classify(name, exe):
+    """The per-process checks as they were done before AppClassifier"""
+    if name.lower() in EXCLUDED_PROCESSES:
+        return None
+    app_lower = name.lower()
+    if any(keyword in app_lower for keyword in APP_KEYWORDS):
+        return True
+    if not exe:
+        return False
+    exe_lower = exe.lower()
+    if any(path in exe_lower for path in SYSTEM_PATHS):
+        return False
+    return any(path in exe_lower for path in APP_PATHS)
+
+
+def compiled_classify(classifier, name, exe):
+    if classifier.is_excluded(name):
+        return None
+    if classifier.is_priority(name):
+        return True
+    return classifier.is_user_path(exe)
+
+
+def synthetic_processes(count, seed=1):
+    rng = random.Random(seed)
+    pool = APP_KEYWORDS + EXCLUDED_PROCESSES + ['helper', 'updater', 'agent', 'service', 'tray']
+    procs = []
+    for i in range(count):
+        name = rng.choice(pool) + rng.choice(['', 'x', '64', 'host', str(i % 50)])
+        exe = rng.choice(DIRS) + name + '.exe' if rng.random() > 0.1 else None
+        procs.append((name, exe))
+    return procs
+
+
+def best_of(func, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    procs = synthetic_processes(1000)
+    classifier = AppClassifier(APP_KEYWORDS, EXCLUDED_PROCESSES)
+
+    legacy = [legacy_classify(name, exe) for name, exe in procs]
+    compiled = [compiled_classify(classifier, name, exe) for name, exe in procs]
+    assert legacy == compiled, "classifier disagrees with the legacy checks"
+
+    t_legacy = best_of(lambda: [legacy_classify(n, e) for n, e in procs])
+    def cold():
+        fresh = AppClassifier(APP_KEYWORDS, EXCLUDED_PROCESSES)
+        return [compiled_classify(fresh, n, e) for n, e in procs]
+
+    t_cold = best_of(cold)
+
+    t_warm = best_of(lambda: [compiled_classify(classifier, n, e) for n, e in procs])
+
+    print(f"{len(procs)} synthetic processes")
+    print(f"  legacy linear scans : {t_legacy * 1000:8.3f} ms")
+    print(f"  compiled (cold)     : {t_cold * 1000:8.3f} ms")
+    print(f"  compiled (memoized) : {t_warm * 1000:8.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
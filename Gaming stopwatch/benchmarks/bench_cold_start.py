@@ -0,0 +1,121 @@
+"""Cold-start time of the headless CLI and of the GUI.
+
+Each case runs in a fresh interpreter; the median of several runs is shown.
+Also checks that the headless path never imports tkinter and that importing
+the GUI doesn't import psutil. With a display, the GUI is also launched on
+a large history to time the first paint and the history becoming usable.
+
+Run from the "Gaming stopwatch" folder:  python benchmarks/bench_cold_start.py
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RUNS = 7
+HISTORY_SESSIONS = 200_000
+
+# Runs in the history folder; prints ms from interpreter start to each stage
+LAUNCH_SCRIPT = r"""
+import json, sys, time
+start = time.perf_counter()
+sys.path.insert(0, sys.argv[1])
+import tkinter as tk
+import stopwatch
+imported = time.perf_counter()
+root = tk.Tk()
+app = stopwatch.StopwatchGUI(root)
+built = time.perf_counter()
+stages = {}
+
+def ms(t):
+    return round((t - start) * 1000, 1)
+
+def painted(event):
+    if event.widget is root and 'first_paint' not in stages:
+        root.update_idletasks()
+        stages['first_paint'] = ms(time.perf_counter())
+
+def wait_for_history():
+    if not app.history_ready:
+        root.after(5, wait_for_history)
+        return
+    stages['history_ready'] = ms(time.perf_counter())
+    root.destroy()
+
+root.bind('<Map>', painted, add='+')
+root.after(5, wait_for_history)
+root.mainloop()
+print(json.dumps({'import': ms(imported), 'constructed': ms(built), **stages}))
+"""
+
+
+def median_runtime(args, cwd):
+    times = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        subprocess.run(args, cwd=cwd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def write_history(path, count):
+    with open(path, 'w', encoding='utf-8') as f:
+        for i in range(count):
+            f.write(json.dumps({'task': f"Game {i % 50}", 'start': 1_700_000_000 + i * 3600,
+                                'duration_ns': 1_800_000_000_000, 'laps': 0}) + "\n")
+
+
+def launch_stages(cwd):
+    """Median ms to each GUI startup stage, or None when there's no display"""
+    runs = []
+    for _ in range(3):
+        proc = subprocess.run([sys.executable, '-c', LAUNCH_SCRIPT, HERE], cwd=cwd,
+                              capture_output=True, text=True)
+        if proc.returncode != 0:
+            return None
+        runs.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+    return {stage: statistics.median(run[stage] for run in runs) for stage in runs[0]}
+
+
+def main():
+    cli = os.path.join(HERE, 'cli.py')
+    with tempfile.TemporaryDirectory() as tmp:
+        cases = [
+            ("python -c pass (baseline)", [sys.executable, '-c', 'pass']),
+            ("cli.py status (no daemon)", [sys.executable, cli, 'status']),
+            ("cli.py history", [sys.executable, cli, 'history']),
+            ("import stopwatch (GUI module)", [sys.executable, '-c', 'import stopwatch']),
+        ]
+        for name, args in cases:
+            cwd = HERE if args[-1] == 'import stopwatch' else tmp
+            print(f"{name:>32}: {median_runtime(args, cwd) * 1000:8.1f} ms")
+
+    check = subprocess.run(
+        [sys.executable, '-c', "import sys, cli; print(sorted({'tkinter', 'psutil'} & set(sys.modules)))"],
+        cwd=HERE, capture_output=True, text=True
+    )
+    print(f"{'modules loaded by cli':>32}: {check.stdout.strip()}")
+    check = subprocess.run(
+        [sys.executable, '-c', "import sys, stopwatch; print('psutil' in sys.modules)"],
+        cwd=HERE, capture_output=True, text=True
+    )
+    print(f"{'import stopwatch loads psutil':>32}: {check.stdout.strip()}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        write_history(os.path.join(tmp, "task_history.jsonl"), HISTORY_SESSIONS)
+        stages = launch_stages(tmp)
+    if stages is None:
+        print(f"{'GUI launch':>32}: skipped (no display)")
+        return
+    print(f"GUI launch with {HISTORY_SESSIONS:,} sessions of history (ms since interpreter start):")
+    for stage, ms in stages.items():
+        print(f"{stage.replace('_', ' '):>32}: {ms:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Scan latency of LinuxBackend vs psutil.process_iter on synthetic /proc trees.
+
+Builds fake /proc directories with 100, 1,000 and 10,000 processes and
+points both scanners at them (psutil via psutil.PROCFS_PATH). Linux only.
+
+Run from the "Gaming stopwatch" folder:  python benchmarks/bench_discovery.py
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from discovery import LinuxBackend
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+SIZES = [100, 1000, 10000]
+NAMES = ['steam', 'discord', 'firefox', 'code', 'bash', 'pipewire', 'helper']
+
+
+def build_proc_tree(root, count):
+    """Write stat, cmdline, status and exe entries for `count` fake processes"""
+    uid = os.getuid()
+    with open(os.path.join(root, 'stat'), 'w') as f:
+        f.write("cpu  1 2 3 4 5 6 7 0 0 0\nbtime 1700000000\n")
+    for i in range(count):
+        pid = str(1000 + i)
+        name = NAMES[i % len(NAMES)] + str(i % 97)
+        exe = f"/usr/bin/{name}"
+        pid_dir = os.path.join(root, pid)
+        os.mkdir(pid_dir)
+        fields = ['S', '1', pid, pid, '0', '-1', '4194560'] + ['0'] * 12 + [str(5000 + i)] + ['0'] * 30
+        with open(os.path.join(pid_dir, 'stat'), 'w') as f:
+            f.write(f"{pid} ({name[:15]}) {' '.join(fields)}\n")
+        with open(os.path.join(pid_dir, 'cmdline'), 'wb') as f:
+            f.write(exe.encode() + b'\0--flag\0')
+        with open(os.path.join(pid_dir, 'status'), 'w') as f:
+            f.write(f"Name:\t{name[:15]}\nTgid:\t{pid}\nPid:\t{pid}\nPPid:\t1\n"
+                    f"Uid:\t{uid}\t{uid}\t{uid}\t{uid}\nGid:\t0\t0\t0\t0\n")
+        os.symlink(exe, os.path.join(pid_dir, 'exe'))
+
+
+def best_of(func, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def psutil_scan(attrs):
+    def scan():
+        results = []
+        for proc in psutil.process_iter(attrs):
+            results.append(proc.info)
+        return results
+    return scan
+
+
+def main():
+    if not sys.platform.startswith('linux'):
+        print("bench_discovery needs Linux (/proc)")
+        return
+
+    print(f"{'procs':>7} {'LinuxBackend':>14} {'psutil (old attrs)':>20} {'psutil (pid/name/ctime)':>25}")
+    for count in SIZES:
+        root = tempfile.mkdtemp(prefix='fakeproc-')
+        try:
+            build_proc_tree(root, count)
+            backend = LinuxBackend(proc_root=root)
+            assert len(backend.processes()) == count
+
+            t_backend = best_of(backend.processes)
+            t_old = t_new = float('nan')
+            if psutil is not None:
+                real_procfs = psutil.PROCFS_PATH
+                psutil.PROCFS_PATH = root
+                try:
+                    t_old = best_of(psutil_scan(['pid', 'name', 'exe', 'username']))
+                    t_new = best_of(psutil_scan(['pid', 'name', 'create_time']))
+                finally:
+                    psutil.PROCFS_PATH = real_procfs
+            print(f"{count:>7} {t_backend * 1000:>11.2f} ms {t_old * 1000:>17.2f} ms {t_new * 1000:>22.2f} ms")
+        finally:
+            shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Export throughput for CSV and the columnar format at 1M sessions.
+
+Writes a synthetic 1M-session JSONL history, then streams it through both
+exporters and reports rows per second, output size and peak RSS growth.
+
+Run from the "Gaming stopwatch" folder:  python benchmarks/bench_export.py [sessions]
+"""
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from export import export_history, read_columnar
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+SESSIONS = 1_000_000
+
+
+def peak_rss_mb():
+    if resource is None:
+        return float('nan')
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 if sys.platform != 'darwin' else peak / (1024 * 1024)
+
+
+def write_history(path, count):
+    with open(path, 'w') as f:
+        for i in range(count):
+            f.write(json.dumps({
+                'task': f"game{i % 300}",
+                'start_time': f"2025-{i % 12 + 1:02d}-{i % 28 + 1:02d} 18:13:56",
+                'duration': 60.0 + (i % 5000) / 7,
+                'laps': i % 9
+            }, separators=(',', ':')) + '\n')
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else SESSIONS
+    tmp = tempfile.mkdtemp(prefix='export-bench-')
+    try:
+        history = os.path.join(tmp, 'task_history.jsonl')
+        write_history(history, count)
+        print(f"{count} sessions, history file {os.path.getsize(history) / 1e6:.1f} MB")
+        for fmt, name in (('csv', 'out.csv'), ('columnar', 'out.stwc')):
+            out = os.path.join(tmp, name)
+            rss_before = peak_rss_mb()
+            start = time.perf_counter()
+            rows = export_history(history, out, fmt)
+            elapsed = time.perf_counter() - start
+            print(f"  {fmt:>9}: {rows / elapsed:12,.0f} rows/s  {elapsed:6.2f} s  "
+                  f"{os.path.getsize(out) / 1e6:7.1f} MB  peak RSS +{peak_rss_mb() - rss_before:.1f} MB")
+
+        with open(os.path.join(tmp, 'out.stwc'), 'rb') as f:
+            read_back = sum(len(columns['duration_ns']) for names, columns in read_columnar(f))
+        assert read_back == count
+    finally:
+        shutil.rmtree(tmp)
+
+
+if __name__ == "__main__":
+    main()
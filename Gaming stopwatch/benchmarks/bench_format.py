@@ -0,0 +1,61 @@
+"""Time formatting: the old float format_time vs the integer-ns formatters.
+
+Covers the 100 Hz display tick (consecutive values 10 ms apart) and a
+batch of 10,000 random durations like a lap list or history page.
+
+Run from the "Gaming stopwatch" folder:  python benchmarks/bench_format.py
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from timing import NS_PER_SECOND, TimeFormatter, format_many, format_ns
+
+VALUES = 10_000
+
+
+def legacy_format_time(seconds):
+    """format_time as it was: float divisions and an f-string per call"""
+    hours = int(seconds // 3600)
+    minutes = int((seconds % 3600) // 60)
+    secs = int(seconds % 60)
+    milliseconds = int((seconds % 1) * 100)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}.{milliseconds:02d}"
+
+
+def best_of(func, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    rng = random.Random(11)
+    ticks_ns = [3_600 * NS_PER_SECOND + i * 10_000_000 for i in range(VALUES)]
+    random_ns = [rng.randint(0, 10 * 3600 * NS_PER_SECOND) for _ in range(VALUES)]
+    formatter = TimeFormatter()
+
+    cases = [
+        ("tick: legacy format_time", lambda: [legacy_format_time(ns / NS_PER_SECOND) for ns in ticks_ns]),
+        ("tick: format_ns", lambda: [format_ns(ns) for ns in ticks_ns]),
+        ("tick: TimeFormatter", lambda: [formatter.format(ns) for ns in ticks_ns]),
+        ("batch: legacy format_time", lambda: [legacy_format_time(ns / NS_PER_SECOND) for ns in random_ns]),
+        ("batch: format_ns", lambda: [format_ns(ns) for ns in random_ns]),
+        ("batch: format_many", lambda: format_many(random_ns)),
+    ]
+    assert [formatter.format(ns) for ns in ticks_ns] == [format_ns(ns) for ns in ticks_ns]
+    assert format_many(random_ns) == [format_ns(ns) for ns in random_ns]
+
+    print(f"{'case':<28} {'ns/value':>9}")
+    for name, func in cases:
+        print(f"{name:<28} {best_of(func) / VALUES * 1e9:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
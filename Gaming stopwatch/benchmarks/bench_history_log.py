@@ -0,0 +1,81 @@
+"""Per-stop save cost: append-only JSONL log vs rewriting the whole JSON list.
+
+Pre-fills a history with N sessions, then times saving one more session.
+The legacy rewrite is only measured up to 100k sessions (it gets slow).
+
+Run from the "Gaming stopwatch" folder:  python benchmarks/bench_history_log.py
+"""
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from history_store import FSYNC_ALWAYS, FSYNC_NEVER, JsonlHistoryStore
+from records import Session
+
+SIZES = [1_000, 10_000, 100_000, 1_000_000]
+LEGACY_LIMIT = 100_000
+APPENDS = 200
+
+
+def make_session(i):
+    return {
+        'task': f"game{i % 40}",
+        'start_time': '2025-12-27 18:13:56',
+        'duration': 1234.5678 + i,
+        'duration_formatted': '00:20:34.56',
+        'laps': i % 7
+    }
+
+
+def prefill(path, count):
+    with open(path, 'wb') as f:
+        for i in range(count):
+            f.write(json.dumps(make_session(i), separators=(',', ':')).encode() + b'\n')
+
+
+def time_appends(path, fsync):
+    store = JsonlHistoryStore(path, fsync=fsync)
+    sessions = [Session.from_dict(make_session(i)) for i in range(APPENDS)]
+    store.append(Session.from_dict(make_session(-1)))  # open the file outside the timed loop
+    start = time.perf_counter()
+    for session in sessions:
+        store.append(session)
+    elapsed = time.perf_counter() - start
+    store.close()
+    return elapsed / APPENDS
+
+
+def time_legacy_save(path, count):
+    sessions = [make_session(i) for i in range(count)]
+    start = time.perf_counter()
+    with open(path, 'w') as f:
+        json.dump(sessions, f, indent=2)
+    return time.perf_counter() - start
+
+
+def main():
+    tmp = tempfile.mkdtemp(prefix='history-bench-')
+    try:
+        print(f"{'sessions':>10} {'append (no fsync)':>18} {'append (fsync)':>16} {'legacy rewrite':>16}")
+        for count in SIZES:
+            path = os.path.join(tmp, 'task_history.jsonl')
+            prefill(path, count)
+            t_fast = time_appends(path, FSYNC_NEVER)
+            t_safe = time_appends(path, FSYNC_ALWAYS)
+            if count <= LEGACY_LIMIT:
+                legacy = f"{time_legacy_save(os.path.join(tmp, 'legacy.json'), count) * 1000:>13.2f} ms"
+            else:
+                legacy = f"{'skipped':>16}"
+            print(f"{count:>10} {t_fast * 1e6:>15.1f} us {t_safe * 1e6:>13.1f} us {legacy}")
+            os.remove(path)
+    finally:
+        shutil.rmtree(tmp)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Cost of recording 10,000 laps: full highlight rebuild vs incremental stats.
+
+Uses a fake listbox that only counts Tk calls, so it runs headless.
+
+Run from the "Gaming stopwatch" folder:  python benchmarks/bench_laps.py
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from timing import TimingEngine
+
+LAPS = 10_000
+
+
+class FakeListbox:
+    def __init__(self):
+        self.rows = 0
+        self.itemconfig_calls = 0
+
+    def size(self):
+        return self.rows
+
+    def insert(self, index, text):
+        self.rows += 1
+
+    def itemconfig(self, index, **options):
+        self.itemconfig_calls += 1
+
+
+def lap_clock(seed=7):
+    """A fake ns clock that advances by a random split on every read"""
+    rng = random.Random(seed)
+    now = [0]
+
+    def clock():
+        now[0] += rng.randint(40, 90) * 1_000_000_000
+        return now[0]
+    return clock
+
+
+def legacy_run(laps):
+    """record_lap/highlight_laps as they were: rebuild splits, repaint every row"""
+    listbox = FakeListbox()
+    clock = lap_clock()
+    lap_times = []
+    for _ in range(laps):
+        lap_times.append(clock())
+        listbox.insert('end', '')
+        if len(lap_times) > 1:
+            splits = [lap_times[0]]
+            for i in range(1, len(lap_times)):
+                splits.append(lap_times[i] - lap_times[i - 1])
+            fastest_idx = splits.index(min(splits))
+            slowest_idx = splits.index(max(splits))
+            for i in range(listbox.size()):
+                listbox.itemconfig(i, bg='#2a2a2a', fg='#ffffff')
+            listbox.itemconfig(fastest_idx, fg='#00ff00')
+            listbox.itemconfig(slowest_idx, fg='#ff4444')
+    return listbox.itemconfig_calls
+
+
+def incremental_run(laps):
+    """The current approach: SplitStats in the engine, recolour only changed rows"""
+    listbox = FakeListbox()
+    timer = TimingEngine(clock=lap_clock())
+    timer.start()
+    highlighted = (None, None)
+    for _ in range(laps):
+        timer.lap()
+        listbox.insert('end', '')
+        splits = timer.splits
+        if splits.count < 2:
+            continue
+        new = (splits.fastest_index, splits.slowest_index)
+        if new == highlighted:
+            continue
+        for idx in highlighted:
+            if idx is not None and idx not in new:
+                listbox.itemconfig(idx, bg='#2a2a2a', fg='#ffffff')
+        listbox.itemconfig(new[0], fg='#00ff00')
+        listbox.itemconfig(new[1], fg='#ff4444')
+        highlighted = new
+    return listbox.itemconfig_calls
+
+
+def main():
+    for name, run, laps in (("legacy", legacy_run, LAPS), ("incremental", incremental_run, LAPS)):
+        start = time.perf_counter()
+        calls = run(laps)
+        elapsed = time.perf_counter() - start
+        print(f"{name:>12}: {laps} laps in {elapsed:8.3f} s "
+              f"({elapsed / laps * 1e6:8.1f} us/lap), {calls} itemconfig calls")
+
+
+if __name__ == "__main__":
+    main()
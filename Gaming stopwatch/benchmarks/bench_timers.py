@@ -0,0 +1,40 @@
+"""Shared-tick refresh cost of TimerRegistry as the number of timers grows.
+
+Simulates the 10 Hz background-timer tick with a fake clock, counting how
+many rows would be redrawn. Runs headless.
+
+Run from the "Gaming stopwatch" folder:  python benchmarks/bench_timers.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from timers import TimerRegistry
+
+COUNTS = [1, 10, 50, 200]
+TICKS = 2000  # 200 s of 10 Hz ticks
+TICK_NS = 100_000_000
+
+
+def main():
+    print(f"{'timers':>7} {'us/tick':>9} {'us/timer/tick':>14} {'redraws/tick':>13}")
+    for count in COUNTS:
+        now = [0]
+        registry = TimerRegistry(clock=lambda: now[0])
+        for i in range(count):
+            now[0] += 12_345_678  # stagger start phases
+            registry.start(f"app{i}")
+        redraws = 0
+        start = time.perf_counter()
+        for _ in range(TICKS):
+            now[0] += TICK_NS
+            redraws += len(registry.changed())
+        elapsed = time.perf_counter() - start
+        per_tick = elapsed / TICKS * 1e6
+        print(f"{count:>7} {per_tick:>9.2f} {per_tick / count:>14.3f} {redraws / TICKS:>13.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,473 @@
+"""Benchmark suite for the stopwatch's hot paths, with JSON results.
+
+Runs headless: the real StopwatchGUI methods are called on an instance
+whose Tk widgets are do-nothing fakes, and process scans read a synthetic
+process table through a fake discovery backend instead of psutil.
+
+    python benchmarks/suite.py                       default sizes, table on stdout
+    python benchmarks/suite.py --quick               small sizes, for a smoke run
+    python benchmarks/suite.py --full                adds 1M-session history cases
+    python benchmarks/suite.py -o after.json --compare before.json
+    python benchmarks/suite.py --only scan,history   run matching cases only
+
+Each result has a name, its parameters, the unit and the median and best
+of several repeats, so two JSON files can be compared case by case
+(with --compare, a ratio above 1 means faster than the baseline).
+
+Run from the "Gaming stopwatch" folder.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+HERE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, HERE)
+
+import psutil
+
+from checkpoint import CheckpointFile
+from classifier import AppClassifier
+from discovery import WindowsBackend
+from history_store import build_session, open_history_store
+from history_writer import HistoryWriter
+from lapfile import LapStore, finish
+from scanner import ProcessCache
+from stopwatch import StopwatchGUI
+from timing import NS_PER_SECOND, TimeFormatter, TimingEngine, format_many, format_ns, format_time
+
+SIZES = {
+    'quick': {'procs': [100, 1000], 'laps': 1000, 'history': [1000, 10_000]},
+    'default': {'procs': [100, 1000, 10_000], 'laps': 10_000, 'history': [1000, 10_000, 100_000]},
+    'full': {'procs': [100, 1000, 10_000], 'laps': 10_000, 'history': [1000, 10_000, 100_000, 1_000_000]},
+}
+REPEAT = 5
+
+KEYWORDS = ['game', 'steam', 'discord', 'obs', 'code', 'chrome', 'firefox', 'spotify', 'minecraft']
+EXCLUDED = ['svchost', 'system', 'csrss', 'dwm', 'conhost', 'explorer', 'runtimebroker', 'dllhost']
+APP_NAMES = ['steam', 'discord', 'chrome', 'minecraft', 'notepad', 'blender', 'vlc', 'helper']
+SYSTEM_NAMES = ['svchost', 'conhost', 'dllhost', 'wmiprvse', 'audiodg', 'taskhostw', 'spoolsv']
+
+
+class FakeWidget:
+    """Accepts any Tk widget call and does nothing"""
+
+    def __getattr__(self, name):
+        return self._noop
+
+    def _noop(self, *args, **kwargs):
+        return None
+
+
+class FakeProc:
+    """Stands in for a psutil.Process from process_iter"""
+
+    __slots__ = ('info', '_exe')
+
+    def __init__(self, pid, name, exe):
+        self.info = {'pid': pid, 'name': name, 'create_time': 1_700_000_000.0 + pid}
+        self._exe = exe
+
+    def exe(self):
+        if self._exe is None:
+            raise psutil.AccessDenied(self.info['pid'])
+        return self._exe
+
+
+class FakeBackend(WindowsBackend):
+    """Windows name handling over a synthetic process table"""
+
+    def __init__(self, procs):
+        self.procs = procs
+
+    def processes(self):
+        return list(self.procs)
+
+
+def process_table(count, first_pid=1000):
+    """Mostly system processes, some apps, a few that deny exe() access"""
+    procs = []
+    for i in range(count):
+        pid = first_pid + i
+        if i % 4 == 0:
+            name = f"{APP_NAMES[i % len(APP_NAMES)]}{i % 53}"
+            exe = f"C:\\Program Files\\{name}\\{name}.exe"
+        else:
+            name = f"{SYSTEM_NAMES[i % len(SYSTEM_NAMES)]}{i % 11}"
+            exe = None if i % 20 == 1 else f"C:\\Windows\\System32\\{name}.exe"
+        procs.append(FakeProc(pid, name + '.exe', exe))
+    return procs
+
+
+def fake_clock(step_ns):
+    now = [0]
+
+    def clock():
+        now[0] += step_ns
+        return now[0]
+    return clock
+
+
+def make_gui(clock=time.perf_counter_ns):
+    """A StopwatchGUI with fake widgets, built without running __init__"""
+    gui = StopwatchGUI.__new__(StopwatchGUI)
+    gui.metrics = None
+    gui.timer = TimingEngine(clock)
+    gui.time_formatter = TimeFormatter()
+    gui.displayed_time = None
+    gui.highlighted_laps = (None, None)
+    gui.time_label = FakeWidget()
+    gui.lap_listbox = FakeWidget()
+    gui.discovery = FakeBackend([])
+    gui.classifier = AppClassifier(KEYWORDS, EXCLUDED)
+    gui.process_cache = ProcessCache(gui.classify_process)
+    gui.history_ready = True
+    gui.history_error = None
+    gui.history_loaded = threading.Event()
+    return gui
+
+
+def measure(func, number, repeat=REPEAT, setup=None):
+    """Nanoseconds per call of func over `repeat` rounds of `number` calls"""
+    samples = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter_ns()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter_ns() - start) / number)
+    return samples
+
+
+def result(name, params, unit, samples, **extra):
+    return {
+        'name': name,
+        'params': params,
+        'unit': unit,
+        'median': statistics.median(samples),
+        'best': min(samples),
+        'repeat': len(samples),
+        **extra
+    }
+
+
+def bench_format_time(sizes):
+    rng = random.Random(1)
+    values_ns = [rng.randint(0, 100 * 3600 * NS_PER_SECOND) for _ in range(1000)]
+    values = [ns / NS_PER_SECOND for ns in values_ns]
+    index = [0]
+
+    def call():
+        format_time(values[index[0] % 1000])
+        index[0] += 1
+    yield result('format_time', {}, 'ns/call', measure(call, 100_000))
+
+    def call_ns():
+        format_ns(values_ns[index[0] % 1000])
+        index[0] += 1
+    yield result('format_ns', {}, 'ns/call', measure(call_ns, 100_000))
+
+    formatter = TimeFormatter()
+    tick = [0]
+
+    def call_tick():
+        tick[0] += 10_000_000
+        formatter.format(tick[0])
+    yield result('TimeFormatter.format', {'step_ms': 10}, 'ns/call', measure(call_tick, 100_000))
+    yield result('format_many', {'values': 1000}, 'ns/value',
+                 [sample / 1000 for sample in measure(lambda: format_many(values_ns), 100)])
+
+
+def bench_update_time(sizes):
+    # 1 ms of fake time per read: most ticks change the centiseconds shown
+    gui = make_gui(fake_clock(1_000_000))
+    gui.timer.start()
+    yield result('update_time', {'step_ms': 1}, 'ns/tick', measure(gui.update_time, 100_000))
+
+
+def bench_scan(sizes):
+    for count in sizes['procs']:
+        gui = make_gui()
+        procs = process_table(count)
+        gui.discovery = FakeBackend(procs)
+
+        def cold_setup():
+            gui.process_cache = ProcessCache(gui.classify_process)
+        yield result('get_running_apps.cold', {'procs': count}, 'ns/scan',
+                     measure(gui.get_running_apps, 1, setup=cold_setup))
+
+        gui.get_running_apps()
+        yield result('get_running_apps.warm', {'procs': count}, 'ns/scan',
+                     measure(gui.get_running_apps, 10))
+
+        # Replace 5% of the table before every scan
+        churn = max(1, count // 20)
+        next_pid = [1000 + count]
+
+        def churned():
+            del procs[:churn]
+            procs.extend(process_table(churn, next_pid[0]))
+            next_pid[0] += churn
+            gui.get_running_apps()
+        yield result('get_running_apps.churn5', {'procs': count}, 'ns/scan', measure(churned, 10))
+
+
+def bench_laps(sizes):
+    laps = sizes['laps']
+    gui = make_gui()
+    rng = random.Random(7)
+
+    def lap_clock():
+        # Every read is 40-90 s after the previous one
+        now = [0]
+
+        def clock():
+            now[0] += rng.randint(40, 90) * 1_000_000_000
+            return now[0]
+        return clock
+
+    def fresh():
+        gui.timer = TimingEngine(lap_clock())
+        gui.highlighted_laps = (None, None)
+        gui.timer.start()
+    yield result('record_lap', {'laps': laps}, 'ns/lap', measure(gui.record_lap, laps, setup=fresh))
+
+    # Repainting both highlights from scratch on a full lap list
+    def repaint():
+        gui.highlighted_laps = (None, None)
+        gui.highlight_laps()
+    yield result('highlight_laps.repaint', {'laps': laps}, 'ns/call', measure(repaint, 10_000))
+
+    # The same laps streamed to a lap file, and the cost of stopping after them
+    tmp = tempfile.mkdtemp(prefix="stopwatch-bench-")
+    try:
+        lap_store = LapStore(tmp)
+
+        def fresh_streamed():
+            fresh()
+            lap_store.attach(gui.timer, datetime.now())
+        yield result('record_lap.streamed', {'laps': laps}, 'ns/lap',
+                     measure(gui.record_lap, laps, setup=fresh_streamed))
+
+        # As the GUI does it: the file writes queued for the history writer thread
+        writer = HistoryWriter(None)
+        writer.start()
+        queued_store = LapStore(tmp, run=writer.call)
+
+        def fresh_queued():
+            writer.flush()
+            fresh()
+            queued_store.attach(gui.timer, datetime.now())
+        yield result('record_lap.queued', {'laps': laps}, 'ns/lap',
+                     measure(gui.record_lap, laps, setup=fresh_queued))
+        finish(gui.timer, None)
+        writer.close()
+
+        def stop():
+            session = build_session("Benchmark", datetime.now(), gui.timer.stop(), gui.timer.lap_count)
+            finish(gui.timer, session)
+        yield result('stop.with_lap_file', {'laps': laps}, 'ns/stop',
+                     measure(stop, 1, setup=lambda: (fresh_streamed(), [gui.record_lap() for _ in range(laps)])))
+
+        # Checkpointing a running session: the periodic write and the flushed one on start/stop
+        gui.checkpoint_file = CheckpointFile(os.path.join(tmp, "checkpoint.bin"))
+        gui.selected_task, gui.task_start_time = "Benchmark", datetime.now()
+        fresh_streamed()
+        yield result('save_checkpoint', {'flush': False}, 'ns/call', measure(gui.save_checkpoint, 10_000))
+        yield result('save_checkpoint', {'flush': True}, 'ns/call',
+                     measure(lambda: gui.save_checkpoint(flush=True), 100))
+        finish(gui.timer, None)
+        gui.checkpoint_file.close()
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def write_history(path, count):
+    """Write `count` sessions straight to a history file"""
+    rng = random.Random(3)
+    tasks = [f"App {i}" for i in range(50)]
+    start = datetime(2024, 1, 1)
+    sessions = (
+        build_session(tasks[i % 50], start + timedelta(minutes=37 * i), rng.randint(1, 7200) * 1_000_000_000, i % 10)
+        for i in range(count)
+    )
+    if path.endswith('.db'):
+        from sqlite_store import insert
+        store = open_history_store(path)
+        with store.db:
+            insert(store.db, list(sessions))
+        store.close()
+    else:
+        with open(path, 'wb') as f:
+            for session in sessions:
+                f.write(json.dumps(session.to_dict(), separators=(',', ':')).encode('utf-8') + b'\n')
+
+
+# (task prefix, first day, last day) as typed into the history window
+SEARCHES = [
+    ('App 7', '', ''),                  # one task
+    ('App', '', ''),                    # every task
+    ('', '2024-02-01', '2024-02-29'),   # one month
+    ('App 1', '2024-01-01', '2024-06-30'),  # eleven tasks, half a year
+    ('Zelda', '2024-01-01', '2024-12-31'),  # no such task, a year
+]
+
+
+def bench_history(sizes):
+    gui = make_gui()
+    new_session = build_session("Benchmark", datetime.now(), 90 * 1_000_000_000, 3)
+    tmp = tempfile.mkdtemp(prefix="stopwatch-bench-")
+    try:
+        for count in sizes['history']:
+            for ext in ('jsonl', 'db'):
+                path = os.path.join(tmp, f"history-{count}.{ext}")
+                write_history(path, count)
+                size = os.path.getsize(path)
+
+                def load():
+                    if getattr(gui, 'history', None):
+                        gui.history_writer.close()
+                        gui.history.close()
+                    gui.history = open_history_store(path)
+                    gui.history_writer = HistoryWriter(gui.history)
+                    gui.history_writer.start()
+                    gui.load_history()
+                repeat = 3 if count >= 100_000 else REPEAT
+                yield result('load_history', {'sessions': count, 'store': ext}, 'ns/load',
+                             measure(load, 1, repeat=repeat), file_bytes=size)
+
+                load()
+                # The stats line and breakdowns at the top of the history window
+                def stats():
+                    gui.history.count()
+                    gui.history.total_duration()
+                    gui.history.percentile(50)
+                    for task, _, _ in gui.history.totals_by_task(limit=3):
+                        gui.history.percentile(50, task)
+                        gui.history.percentile(90, task)
+                    gui.history.totals_by_day(limit=3)
+                yield result('history_stats', {'sessions': count, 'store': ext}, 'ns/window', measure(stats, 10))
+
+                # A filter as typed in the history window: the search and its first page
+                for query in SEARCHES:
+                    yield result('search_history', {'sessions': count, 'store': ext, 'query': '|'.join(query)},
+                                 'ns/search', measure(lambda: gui.history.search(*query).sessions(0, 100), 10))
+
+                # What the Tk thread pays per stop, then the whole burst until it's on disk
+                yield result('save_history', {'sessions': count, 'store': ext}, 'ns/session',
+                             measure(lambda: gui.save_history(new_session), 20))
+
+                def burst():
+                    for _ in range(20):
+                        gui.save_history(new_session)
+                    gui.history_writer.flush()
+                yield result('save_history.burst_written', {'sessions': count, 'store': ext}, 'ns/session',
+                             [ns / 20 for ns in measure(burst, 1)])
+                gui.history_writer.close()
+                gui.history.close()
+                gui.history = None
+                os.remove(path)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+BENCHMARKS = {
+    'format_time': bench_format_time,
+    'update_time': bench_update_time,
+    'scan': bench_scan,
+    'laps': bench_laps,
+    'history': bench_history,
+}
+
+
+def metadata():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=HERE,
+                                capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        'written_at': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'machine': platform.machine()
+    }
+
+
+def key(row):
+    return row['name'], json.dumps(row['params'], sort_keys=True)
+
+
+def describe(row):
+    params = ", ".join(f"{k}={v}" for k, v in row['params'].items())
+    return f"{row['name']}" + (f" ({params})" if params else "")
+
+
+def humanize(ns):
+    for unit, scale in (('s', 1e9), ('ms', 1e6), ('us', 1e3)):
+        if ns >= scale:
+            return f"{ns / scale:.2f} {unit}"
+    return f"{ns:.0f} ns"
+
+
+def print_table(results, baseline=None):
+    before = {key(row): row for row in baseline or []}
+    for row in results:
+        line = f"{describe(row):<52} {humanize(row['median']):>10}  best {humanize(row['best']):>10}"
+        old = before.get(key(row))
+        if old:
+            line += f"  x{old['median'] / row['median']:.2f} vs baseline"
+        print(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stopwatch hot-path benchmarks")
+    size = parser.add_mutually_exclusive_group()
+    size.add_argument('--quick', action='store_const', dest='size', const='quick')
+    size.add_argument('--full', action='store_const', dest='size', const='full')
+    parser.add_argument('--only', help="comma-separated benchmark names: " + ", ".join(BENCHMARKS))
+    parser.add_argument('-o', '--output', help="write results as JSON to this file ('-' for stdout)")
+    parser.add_argument('--compare', help="earlier JSON results to compare against")
+    args = parser.parse_args(argv)
+
+    sizes = SIZES[args.size or 'default']
+    names = args.only.split(',') if args.only else list(BENCHMARKS)
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark: {', '.join(unknown)}")
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)['results']
+
+    results = []
+    for name in names:
+        for row in BENCHMARKS[name](sizes):
+            results.append(row)
+            if args.output != '-':
+                print_table([row], baseline)
+
+    report = {'meta': {**metadata(), 'sizes': args.size or 'default'}, 'results': results}
+    if args.output == '-':
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    elif args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
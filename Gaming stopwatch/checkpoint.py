@@ -0,0 +1,158 @@
+"""Checkpoint of the running stopwatch, so a crash doesn't lose the session.
+
+The checkpoint file has a fixed size: MAGIC and two record slots, updated
+in place through a memory map. Writes alternate between the slots and each
+record carries a sequence number and a CRC, so a write torn by a crash
+leaves the other slot intact. Periodic checkpoints are only copied into
+the map (the OS writes them back; they survive the app being killed), and
+starting or stopping the timer also flushes them to disk, which the GUI
+leaves to its history writer thread.
+"""
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from collections import namedtuple
+from datetime import datetime
+
+from history_store import build_session
+from lapfile import finish
+from timing import TimingEngine
+
+MAGIC = b'STWCKP1\0'
+# seq, active, start (epoch s), elapsed ns, saved at (epoch ns), laps, lap file, task
+RECORD = struct.Struct('<QBqqqI64s256s')
+CRC = struct.Struct('<I')
+SLOT_SIZE = RECORD.size + CRC.size
+FILE_SIZE = len(MAGIC) + 2 * SLOT_SIZE
+INTERVAL_MS = 5000  # how often a running session is checkpointed
+
+Checkpoint = namedtuple('Checkpoint', ['task', 'start', 'elapsed_ns', 'laps', 'lap_file', 'saved_at'])
+
+
+def _text(data):
+    return data.rstrip(b'\0').decode('utf-8', 'ignore')
+
+
+class CheckpointFile:
+    """The fixed-size, memory-mapped checkpoint of one running session"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'r+b' if os.path.exists(path) else 'w+b') as f:
+            if os.fstat(f.fileno()).st_size != FILE_SIZE:
+                f.truncate(FILE_SIZE)
+            self._map = mmap.mmap(f.fileno(), FILE_SIZE)
+        if self._map[:len(MAGIC)] != MAGIC:
+            # New, or not a checkpoint file: start from empty slots
+            self._map[:] = bytes(FILE_SIZE)
+            self._map[:len(MAGIC)] = MAGIC
+        self._seq = max((slot[0] for slot in self._slots()), default=0)
+        self._lock = threading.Lock()  # writes may come from two threads
+
+    @property
+    def seq(self):
+        """Sequence number of the last record written"""
+        return self._seq
+
+    def _slots(self):
+        """Valid (seq, fields) records, in slot order"""
+        slots = []
+        for index in range(2):
+            offset = len(MAGIC) + index * SLOT_SIZE
+            record = self._map[offset:offset + RECORD.size]
+            (crc,) = CRC.unpack_from(self._map, offset + RECORD.size)
+            if crc == zlib.crc32(record) and any(record):
+                fields = RECORD.unpack(record)
+                slots.append((fields[0], fields))
+        return slots
+
+    def read(self):
+        """The newest checkpoint, or None if no session was running"""
+        slots = self._slots()
+        if not slots:
+            return None
+        seq, active, start, elapsed_ns, saved_at, laps, lap_file, task = max(slots)[1]
+        if not active:
+            return None
+        return Checkpoint(_text(task), start, elapsed_ns, laps, _text(lap_file) or None, saved_at)
+
+    def _put(self, active, fields, flush, if_seq=None):
+        with self._lock:
+            if if_seq is not None and if_seq != self._seq:
+                return
+            self._seq += 1
+            record = RECORD.pack(self._seq, active, *fields)
+            offset = len(MAGIC) + (self._seq % 2) * SLOT_SIZE
+            self._map[offset:offset + SLOT_SIZE] = record + CRC.pack(zlib.crc32(record))
+        if flush:
+            self.flush()
+
+    def write(self, checkpoint, flush=False):
+        """Record the running session; flush=True also waits for the disk"""
+        self._put(1, (
+            checkpoint.start, checkpoint.elapsed_ns, checkpoint.saved_at, checkpoint.laps,
+            (checkpoint.lap_file or '').encode('utf-8')[:64],
+            checkpoint.task.encode('utf-8')[:256]
+        ), flush)
+
+    def clear(self, if_seq=None):
+        """No session is running any more
+
+        With `if_seq`, only if nothing was written since the record with
+        that sequence number (so a late clear can't hide a newer session).
+        """
+        self._put(0, (0, 0, 0, 0, b'', b''), True, if_seq)
+
+    def flush(self):
+        """Wait until what's in the map is on disk"""
+        self._map.flush()
+
+    def close(self):
+        if not self._map.closed:
+            self._map.close()
+
+
+def capture(engine, task, started_at):
+    """Checkpoint of an engine timing `task` since `started_at` (a datetime or None)"""
+    sink = engine.lap_sink
+    return Checkpoint(
+        task or '', int(started_at.timestamp()) if started_at else 0, engine.elapsed_ns(),
+        engine.lap_count, sink.name if sink is not None else None, time.time_ns()
+    )
+
+
+def restore(checkpoint, engine, lap_store):
+    """Load a checkpointed session's time and laps into a stopped engine
+
+    Laps come from the session's lap file, which the engine keeps appending
+    to. A lap taken after the last checkpoint moves the elapsed time up to it.
+    """
+    laps = ()
+    if checkpoint.lap_file:
+        laps = lap_store.reopen(engine, checkpoint.lap_file) or ()
+    engine.restore(max(checkpoint.elapsed_ns, laps[-1] if laps else 0), laps)
+
+
+def finalize(checkpoint, lap_store):
+    """The session a checkpoint describes, as it was when last saved
+
+    Returns None (and deletes its lap file) if there is nothing to keep.
+    """
+    engine = TimingEngine()
+    restore(checkpoint, engine, lap_store)
+    session = None
+    if checkpoint.task and engine.elapsed_ns() > 0:
+        session = build_session(checkpoint.task, datetime.fromtimestamp(checkpoint.start),
+                                engine.elapsed_ns(), engine.lap_count, {'recovered': True})
+    finish(engine, session)
+    return session
+
+
+def discard(checkpoint, lap_store):
+    """Throw a checkpointed session away, with its lap file"""
+    engine = TimingEngine()
+    restore(checkpoint, engine, lap_store)
+    finish(engine, None)
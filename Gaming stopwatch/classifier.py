@@ -0,0 +1,67 @@
+import re
+
+# Executables under these directories are never shown
+SYSTEM_PATHS = [
+    'c:\\windows\\system32',
+    'c:\\windows\\syswow64',
+    'c:\\windows\\winsxs',
+    'c:\\program files\\windows',
+    'c:\\program files (x86)\\windows'
+]
+
+# Executables under these directories are treated as user apps
+APP_PATHS = [
+    'program files',
+    'users\\',
+    'appdata',
+    'steam',
+    'epic games'
+]
+
+
+def compile_substrings(words):
+    """Build one regex that matches if any of the words occurs in a string"""
+    # Longest first so overlapping keywords don't shadow each other
+    ordered = sorted(set(words), key=len, reverse=True)
+    if not ordered:
+        return re.compile(r'(?!)')
+    return re.compile('|'.join(re.escape(word) for word in ordered))
+
+
+class AppClassifier:
+    """Precompiled keyword, exclusion and path matching for process names"""
+
+    def __init__(self, app_keywords, excluded_processes,
+                 system_paths=SYSTEM_PATHS, app_paths=APP_PATHS):
+        self.excluded = frozenset(name.lower() for name in excluded_processes)
+        self._keywords = compile_substrings(k.lower() for k in app_keywords)
+        self._system_paths = compile_substrings(p.lower() for p in system_paths)
+        self._app_paths = compile_substrings(p.lower() for p in app_paths)
+        self._priority = {}
+        self._paths = {}
+
+    def is_excluded(self, app_name):
+        """Check if a display name is in the exclusion list"""
+        return app_name.lower() in self.excluded
+
+    def is_priority(self, app_name):
+        """Check if a display name contains one of the app keywords"""
+        result = self._priority.get(app_name)
+        if result is None:
+            result = self._keywords.search(app_name.lower()) is not None
+            self._priority[app_name] = result
+        return result
+
+    def is_user_path(self, exe):
+        """Check if an executable path points at a user-facing application"""
+        if not exe:
+            return False
+        result = self._paths.get(exe)
+        if result is None:
+            exe_lower = exe.lower()
+            if self._system_paths.search(exe_lower):
+                result = False
+            else:
+                result = self._app_paths.search(exe_lower) is not None
+            self._paths[exe] = result
+        return result
@@ -0,0 +1,281 @@
+"""Headless stopwatch: command line and local socket control, no Tk needed.
+
+    python cli.py run --task "Minecraft"     time in the foreground (Enter = lap, Ctrl+C = stop)
+    python cli.py daemon                     keep a stopwatch running in the background
+    python cli.py start --task "Minecraft"   control the daemon
+    python cli.py lap | stop | status | reset | shutdown
+    python cli.py history --limit 20         list recent sessions (no daemon needed)
+    python cli.py laps 1                     laps of the most recent session
+    python cli.py gui                        open the Tk window
+    python cli.py gui --profile m.json       ...with hot-path timings (F12) saved to m.json
+
+Only `gui` imports tkinter; everything else uses the same TimingEngine and
+history stores as the window.
+"""
+import argparse
+import getpass
+import json
+import os
+import socket
+import socketserver
+import sys
+import tempfile
+import threading
+from datetime import datetime
+
+from history_store import build_session, open_history_store
+from lapfile import LapStore, finish
+from metrics import PROFILE_ENV
+from timing import TimingEngine, format_ns, format_time
+
+DEFAULT_HISTORY = "task_history.jsonl"
+DEFAULT_SOCKET = os.path.join(tempfile.gettempdir(), f"stopwatch-{getpass.getuser()}.sock")
+TCP_ADDRESS = ('127.0.0.1', 47615)  # used where AF_UNIX is unavailable
+
+
+class StopwatchService:
+    """One stopwatch plus history, driven by command dicts"""
+
+    def __init__(self, history, lap_store=None):
+        self.history = history
+        self.lap_store = lap_store
+        self.timer = TimingEngine()
+        self.task = None
+        self.task_start_time = None
+
+    def handle(self, request):
+        command = request.get('cmd')
+        handler = getattr(self, f"cmd_{command}", None)
+        if handler is None:
+            return {'ok': False, 'error': f"unknown command: {command}"}
+        return handler(request)
+
+    def cmd_start(self, request):
+        if self.timer.running:
+            return {'ok': False, 'error': "already running", **self.status()}
+        if request.get('task'):
+            self.task = request['task']
+        self.task_start_time = datetime.now()
+        if self.lap_store is not None and self.task:
+            self.lap_store.attach(self.timer, self.task_start_time)
+        self.timer.start()
+        return {'ok': True, **self.status()}
+
+    def cmd_stop(self, request):
+        if not self.timer.running:
+            return {'ok': False, 'error': "not running", **self.status()}
+        elapsed_ns = self.timer.stop()
+        response = {'ok': True, **self.status()}
+        session = None
+        if self.task and elapsed_ns > 0:
+            session = build_session(self.task, self.task_start_time, elapsed_ns, self.timer.lap_count)
+        finish(self.timer, session)
+        if session:
+            self.history.append(session)
+            response['session'] = session.to_dict()
+        return response
+
+    def cmd_lap(self, request):
+        if not self.timer.running:
+            return {'ok': False, 'error': "not running", **self.status()}
+        lap_ns, split_ns = self.timer.lap()
+        return {'ok': True, 'lap': self.timer.lap_count, 'lap_time': format_ns(lap_ns),
+                'split': format_ns(split_ns), **self.status()}
+
+    def cmd_reset(self, request):
+        finish(self.timer, None)
+        self.timer.reset()
+        return {'ok': True, **self.status()}
+
+    def cmd_status(self, request):
+        return {'ok': True, **self.status()}
+
+    def status(self):
+        return {
+            'task': self.task,
+            'running': self.timer.running,
+            'elapsed': format_ns(self.timer.elapsed_ns()),
+            'laps': self.timer.lap_count
+        }
+
+
+class RequestHandler(socketserver.StreamRequestHandler):
+    """One JSON request line in, one JSON response line out"""
+
+    def handle(self):
+        line = self.rfile.readline()
+        try:
+            request = json.loads(line)
+        except ValueError:
+            request = None
+        if not isinstance(request, dict):
+            response = {'ok': False, 'error': "bad request"}
+        else:
+            if request.get('cmd') == 'shutdown':
+                response = {'ok': True}
+                threading.Thread(target=self.server.shutdown, daemon=True).start()
+            else:
+                response = self.server.service.handle(request)
+        self.wfile.write(json.dumps(response).encode('utf-8') + b'\n')
+
+
+def make_server(address):
+    if hasattr(socket, 'AF_UNIX'):
+        if os.path.exists(address):
+            os.remove(address)
+        return socketserver.UnixStreamServer(address, RequestHandler)
+    return socketserver.TCPServer(TCP_ADDRESS, RequestHandler)
+
+
+def send(address, request):
+    """Send one command to the daemon and return its response"""
+    if hasattr(socket, 'AF_UNIX'):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    else:
+        sock, address = socket.socket(socket.AF_INET, socket.SOCK_STREAM), TCP_ADDRESS
+    with sock:
+        sock.connect(address)
+        sock.sendall(json.dumps(request).encode('utf-8') + b'\n')
+        response = json.loads(sock.makefile('rb').readline())
+    if not isinstance(response, dict):
+        raise ValueError(f"unexpected response: {response!r}")
+    return response
+
+
+def run_daemon(args):
+    history = open_history_store(args.history)
+    history.load()
+    server = make_server(args.socket)
+    server.service = StopwatchService(history, LapStore.for_history(args.history))
+    print(f"Stopwatch daemon listening on {args.socket if hasattr(socket, 'AF_UNIX') else TCP_ADDRESS}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        history.close()
+        if hasattr(socket, 'AF_UNIX') and os.path.exists(args.socket):
+            os.remove(args.socket)
+
+
+def run_foreground(args):
+    """Time one session in this terminal: Enter records a lap, Ctrl+C stops"""
+    history = open_history_store(args.history)
+    history.load()
+    service = StopwatchService(history, LapStore.for_history(args.history))
+    service.handle({'cmd': 'start', 'task': args.task})
+    print(f"Timing {args.task or 'session'}. Press Enter for a lap, Ctrl+C to stop.")
+    try:
+        for _ in sys.stdin:
+            response = service.handle({'cmd': 'lap'})
+            print(f"Lap {response['lap']:02d}:  {response['lap_time']}  (+{response['split']})")
+    except KeyboardInterrupt:
+        pass
+    response = service.handle({'cmd': 'stop'})
+    history.close()
+    print(f"\nStopped at {response['elapsed']}" + (" (saved)" if 'session' in response else ""))
+
+
+def show_history(args):
+    history = open_history_store(args.history)
+    history.load()
+    print(f"Total Sessions: {history.count()}  |  Total Time: {format_time(history.total_duration())}")
+    for i, session in enumerate(history.sessions(0, args.limit), 1):
+        print(f"{i}. {session.start_time} | {session.task[:30]:<30} | {format_ns(session.duration_ns)} | {session.laps} laps")
+    history.close()
+
+
+def show_laps(args):
+    """Print the laps of one saved session, read from its lap file"""
+    history = open_history_store(args.history)
+    history.load()
+    sessions = history.sessions(args.session - 1, 1)
+    history.close()
+    if not sessions:
+        print(f"No session #{args.session}", file=sys.stderr)
+        return 1
+    session = sessions[0]
+    print(f"{session.start_time} | {session.task} | {format_ns(session.duration_ns)}")
+    try:
+        laps = LapStore.for_history(args.history).open(session)
+    except (OSError, ValueError) as e:
+        print(f"Could not read lap file: {e}", file=sys.stderr)
+        return 1
+    if laps is None:
+        print("No lap data saved for this session")
+        return 0
+    with laps:
+        for i, (lap_ns, split_ns) in enumerate(zip(laps, laps.splits()), 1):
+            print(f"Lap {i:02d}:  {format_ns(lap_ns)}  (+{format_ns(split_ns)})")
+    return 0
+
+
+def run_gui(args):
+    # Tk is only imported when the window is actually wanted
+    if args.profile:
+        os.environ[PROFILE_ENV] = args.profile
+    import stopwatch
+    stopwatch.main()
+
+
+def print_response(response):
+    if not response.get('ok'):
+        print(f"Error: {response.get('error')}", file=sys.stderr)
+    if 'running' in response:
+        state = "running" if response['running'] else "stopped"
+        print(f"{response.get('task') or '-'}: {response['elapsed']} ({state}, {response['laps']} laps)")
+    if 'lap' in response:
+        print(f"Lap {response['lap']:02d}:  {response['lap_time']}  (+{response['split']})")
+    return 0 if response.get('ok') else 1
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless task stopwatch")
+    parser.add_argument('--history', default=DEFAULT_HISTORY, help="history file (.jsonl or .db)")
+    parser.add_argument('--socket', default=DEFAULT_SOCKET, help="daemon control socket")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    commands.add_parser('daemon', help="run the stopwatch service")
+    run = commands.add_parser('run', help="time a session in the foreground")
+    run.add_argument('--task')
+    start = commands.add_parser('start', help="start the daemon's stopwatch")
+    start.add_argument('--task')
+    for name in ('stop', 'lap', 'status', 'reset', 'shutdown'):
+        commands.add_parser(name, help=f"{name} (daemon)")
+    history = commands.add_parser('history', help="list recent sessions")
+    history.add_argument('--limit', type=int, default=20)
+    laps = commands.add_parser('laps', help="show the laps of a saved session")
+    laps.add_argument('session', type=int, nargs='?', default=1, help="1 = most recent (as numbered by `history`)")
+    gui = commands.add_parser('gui', help="open the window")
+    gui.add_argument('--profile', nargs='?', const='1', metavar='METRICS_FILE',
+                     help="time hot paths (F12 shows them) and write the metrics on exit")
+
+    args = parser.parse_args(argv)
+    if args.command == 'daemon':
+        return run_daemon(args)
+    if args.command == 'run':
+        return run_foreground(args)
+    if args.command == 'history':
+        return show_history(args)
+    if args.command == 'laps':
+        return show_laps(args)
+    if args.command == 'gui':
+        return run_gui(args)
+
+    request = {'cmd': args.command}
+    if args.command == 'start':
+        request['task'] = args.task
+    try:
+        response = send(args.socket, request)
+    except OSError:
+        print("Stopwatch daemon is not running (start it with: python cli.py daemon)", file=sys.stderr)
+        return 1
+    except ValueError:
+        print("Stopwatch daemon sent a bad response", file=sys.stderr)
+        return 1
+    return print_response(response)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
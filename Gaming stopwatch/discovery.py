@@ -0,0 +1,218 @@
+import os
+import sys
+import time
+
+from classifier import APP_PATHS, SYSTEM_PATHS
+
+# Units of /proc/<pid>/stat start times (clock ticks per second)
+CLOCK_TICKS = os.sysconf('SC_CLK_TCK') if hasattr(os, 'sysconf') else 100
+
+LINUX_SYSTEM_PATHS = [
+    '/sbin/',
+    '/usr/sbin/',
+    '/usr/libexec/',
+    '/usr/lib/systemd/',
+    '/lib/systemd/'
+]
+
+LINUX_APP_PATHS = [
+    '/usr/bin/',
+    '/usr/local/bin/',
+    '/usr/lib/',
+    '/usr/share/',
+    '/opt/',
+    '/snap/',
+    '/app/',
+    '/home/'
+]
+
+# Daemons, shells and desktop plumbing that show up on every Linux box
+LINUX_EXCLUDED_PROCESSES = [
+    'systemd', 'init', 'dbus-daemon', 'dbus-broker', 'bash', 'sh', 'zsh',
+    'fish', 'dash', 'sudo', 'su', 'login', 'agetty', 'sshd', 'ssh-agent',
+    'gpg-agent', 'xorg', 'xwayland', 'pipewire', 'pipewire-pulse',
+    'wireplumber', 'pulseaudio', 'gnome-shell', 'gnome-session-binary',
+    'kwin_x11', 'kwin_wayland', 'plasmashell', 'at-spi-bus-launcher',
+    'at-spi2-registryd', 'xdg-desktop-portal', 'xdg-document-portal',
+    'xdg-permission-store', 'gvfsd', 'tmux', 'screen', 'less', 'tail',
+    'python3'
+]
+
+
+class ProcEntry:
+    """A process read from /proc, shaped like the psutil objects the GUI uses"""
+
+    __slots__ = ('info', 'cmdline', '_proc_root')
+
+    def __init__(self, info, cmdline, proc_root):
+        self.info = info
+        self.cmdline = cmdline
+        self._proc_root = proc_root
+
+    def exe(self):
+        """Resolve the executable path, falling back to argv[0]"""
+        try:
+            return os.readlink(f"{self._proc_root}/{self.info['pid']}/exe")
+        except OSError:
+            argv0 = self.cmdline[0] if self.cmdline else ''
+            if argv0.startswith('/'):
+                return argv0
+            raise
+
+
+class DiscoveryBackend:
+    """Lists processes and says how their names are shown in the dropdown"""
+
+    system_paths = []
+    app_paths = []
+    excluded_processes = []
+    # Exceptions a process lookup can raise when the process is gone or hidden
+    process_errors = (OSError,)
+
+    def processes(self):
+        """Return objects with an .info dict (pid, name, create_time) and .exe()"""
+        raise NotImplementedError
+
+    def display_name(self, name):
+        """Return the name to show for a process name, or None to skip it"""
+        raise NotImplementedError
+
+    def is_alive(self, info):
+        """Check if the process described by an .info dict is still running"""
+        raise NotImplementedError
+
+    def process_age(self, info):
+        """Seconds since the process described by an .info dict started"""
+        raise NotImplementedError
+
+
+class WindowsBackend(DiscoveryBackend):
+    """psutil-based discovery that only lists .exe processes"""
+
+    system_paths = SYSTEM_PATHS
+    app_paths = APP_PATHS
+
+    @property
+    def process_errors(self):
+        # psutil is only imported once processes are actually listed
+        import psutil
+        return (psutil.Error,)
+
+    def processes(self):
+        import psutil
+        return list(psutil.process_iter(['pid', 'name', 'create_time']))
+
+    def display_name(self, name):
+        if not name or not name.endswith('.exe'):
+            return None
+        # Remove .exe extension
+        return name[:-4]
+
+    def is_alive(self, info):
+        import psutil
+        try:
+            # A matching create time guards against a reused PID
+            return psutil.Process(info['pid']).create_time() == info['create_time']
+        except psutil.NoSuchProcess:
+            return False
+        except psutil.AccessDenied:
+            return True
+
+    def process_age(self, info):
+        # psutil reports create_time in epoch seconds
+        return time.time() - info['create_time']
+
+
+class LinuxBackend(DiscoveryBackend):
+    """Discovery that reads /proc/<pid>/stat and cmdline directly"""
+
+    system_paths = LINUX_SYSTEM_PATHS
+    app_paths = LINUX_APP_PATHS
+    excluded_processes = LINUX_EXCLUDED_PROCESSES
+
+    def __init__(self, proc_root='/proc'):
+        self.proc_root = proc_root
+
+    def processes(self):
+        entries = []
+        root = self.proc_root
+        for pid_dir in os.listdir(root):
+            if not pid_dir.isdigit():
+                continue
+            try:
+                stat = read_file(f"{root}/{pid_dir}/stat")
+                cmdline = read_file(f"{root}/{pid_dir}/cmdline")
+            except OSError:
+                continue  # exited while we were scanning
+            if not cmdline:
+                continue  # kernel thread
+            entry = parse_entry(int(pid_dir), stat, cmdline, root)
+            if entry is not None:
+                entries.append(entry)
+        return entries
+
+    def display_name(self, name):
+        return name or None
+
+    def is_alive(self, info):
+        # One read of /proc/<pid>/stat; a different start time means a reused PID
+        try:
+            stat = read_file(f"{self.proc_root}/{info['pid']}/stat")
+        except OSError:
+            return False
+        parsed = parse_stat(stat)
+        return parsed is not None and parsed[1] == info['create_time']
+
+    def process_age(self, info):
+        # create_time is in clock ticks since boot, so compare with the
+        # time since boot rather than going through the (whole-second) btime
+        return time.clock_gettime(time.CLOCK_BOOTTIME) - info['create_time'] / CLOCK_TICKS
+
+
+def read_file(path):
+    """Read up to 4 KiB from a /proc file with a single read() call"""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        return os.read(fd, 4096)
+    finally:
+        os.close(fd)
+
+
+def parse_stat(stat):
+    """Return (comm, start time in clock ticks) from raw stat bytes, or None"""
+    # comm may itself contain spaces or parentheses, so split around the last ')'
+    open_paren = stat.find(b'(')
+    close_paren = stat.rfind(b')')
+    if open_paren < 0 or close_paren < 0:
+        return None
+    comm = stat[open_paren + 1:close_paren].decode('utf-8', 'replace')
+    fields = stat[close_paren + 2:].split()
+    try:
+        return comm, int(fields[19])  # field 22: starttime
+    except (IndexError, ValueError):
+        return None
+
+
+def parse_entry(pid, stat, cmdline, proc_root):
+    """Build a ProcEntry from raw stat and cmdline bytes"""
+    parsed = parse_stat(stat)
+    if parsed is None:
+        return None
+    comm, start_ticks = parsed
+
+    argv = cmdline.rstrip(b'\0').decode('utf-8', 'replace').split('\0')
+    # comm is truncated to 15 characters; prefer the full argv[0] basename
+    name = comm
+    base = os.path.basename(argv[0]) if argv else ''
+    if base.startswith(comm):
+        name = base
+
+    info = {'pid': pid, 'name': name, 'create_time': start_ticks}
+    return ProcEntry(info, argv, proc_root)
+
+
+def get_backend():
+    """Pick the discovery backend for the current platform"""
+    if sys.platform.startswith('linux') and os.path.isdir('/proc'):
+        return LinuxBackend()
+    return WindowsBackend()
@@ -0,0 +1,151 @@
+"""Export session history to CSV or a compact columnar file.
+
+Sessions are streamed from the history store, so memory stays bounded no
+matter how large the history is:
+
+    python export.py sessions.csv
+    python export.py --format columnar sessions.stwc
+    python export.py --history task_history.db --format csv sessions.csv
+"""
+import argparse
+import csv
+import struct
+import sys
+from array import array
+
+from history_store import open_history_store
+from records import local_seconds
+
+FORMATS = ('csv', 'columnar')
+
+# Columnar layout (all integers little-endian):
+#   MAGIC
+#   row group*: b'RG', <II rows, new dictionary entries>,
+#               new task names as <H length + UTF-8 bytes,
+#               task codes (int32), start times (int64 seconds since
+#               1970-01-01 in local wall-clock time), durations (int64 ns),
+#               laps (int32)
+#   b'EN', <Q total rows
+# Task names are dictionary-encoded; each row group only carries the names
+# first seen in it.
+MAGIC = b'STWCOL1\0'
+ROW_GROUP_SIZE = 65536
+
+
+def export_csv(sessions, out):
+    """Write sessions as CSV rows; returns the number of rows"""
+    writer = csv.writer(out)
+    writer.writerow(['task', 'start_time', 'duration_s', 'laps'])
+    rows = 0
+    for session in sessions:
+        writer.writerow([
+            session.task,
+            session.start_time,
+            f"{session.duration:.3f}",
+            session.laps
+        ])
+        rows += 1
+    return rows
+
+
+def export_columnar(sessions, out, row_group_size=ROW_GROUP_SIZE):
+    """Write sessions in row groups of int arrays; returns the number of rows"""
+    out.write(MAGIC)
+    codes = {}
+    total = 0
+    group = new_columns()
+    new_names = []
+    for session in sessions:
+        name = session.task
+        code = codes.get(name)
+        if code is None:
+            code = codes[name] = len(codes)
+            new_names.append(name)
+        group[0].append(code)
+        group[1].append(local_seconds(session.start))
+        group[2].append(session.duration_ns)
+        group[3].append(session.laps)
+        if len(group[0]) >= row_group_size:
+            total += write_row_group(out, group, new_names)
+            group = new_columns()
+            new_names = []
+    if len(group[0]) or not total:
+        total += write_row_group(out, group, new_names)
+    out.write(b'EN' + struct.pack('<Q', total))
+    return total
+
+
+def read_columnar(inp):
+    """Yield (task names, columns) per row group of a columnar export
+
+    columns is a dict of arrays: task (codes into task names), start_time,
+    duration_ns and laps.
+    """
+    if inp.read(len(MAGIC)) != MAGIC:
+        raise ValueError("not a stopwatch columnar export")
+    names = []
+    while True:
+        tag = inp.read(2)
+        if tag == b'EN':
+            return
+        if tag != b'RG':
+            raise ValueError("truncated or corrupt columnar export")
+        rows, new_count = struct.unpack('<II', inp.read(8))
+        for _ in range(new_count):
+            (length,) = struct.unpack('<H', inp.read(2))
+            names.append(inp.read(length).decode('utf-8'))
+        columns = {}
+        for key, typecode in (('task', 'i'), ('start_time', 'q'), ('duration_ns', 'q'), ('laps', 'i')):
+            column = array(typecode)
+            column.frombytes(inp.read(rows * column.itemsize))
+            if sys.byteorder == 'big':
+                column.byteswap()
+            columns[key] = column
+        yield names, columns
+
+
+def new_columns():
+    return (array('i'), array('q'), array('q'), array('i'))
+
+
+def write_row_group(out, columns, new_names):
+    rows = len(columns[0])
+    out.write(b'RG' + struct.pack('<II', rows, len(new_names)))
+    for name in new_names:
+        # Cut at a character boundary so the name still decodes
+        encoded = name.encode('utf-8')[:0xFFFF].decode('utf-8', 'ignore').encode('utf-8')
+        out.write(struct.pack('<H', len(encoded)) + encoded)
+    for column in columns:
+        if sys.byteorder == 'big':
+            column.byteswap()
+        column.tofile(out)
+    return rows
+
+
+def export_history(history_path, out_path, fmt):
+    """Stream every session of a history file into an export file"""
+    store = open_history_store(history_path)
+    try:
+        store.import_legacy()
+        sessions = store.iter_sessions()
+        if fmt == 'csv':
+            with open(out_path, 'w', newline='', encoding='utf-8') as out:
+                return export_csv(sessions, out)
+        with open(out_path, 'wb') as out:
+            return export_columnar(sessions, out)
+    finally:
+        store.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export stopwatch session history")
+    parser.add_argument('output', help="file to write")
+    parser.add_argument('--history', default="task_history.jsonl", help="history file to read")
+    parser.add_argument('--format', choices=FORMATS, default='csv')
+    args = parser.parse_args(argv)
+    rows = export_history(args.history, args.output, args.format)
+    print(f"Exported {rows} sessions to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
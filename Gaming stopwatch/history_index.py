@@ -0,0 +1,126 @@
+import bisect
+from array import array
+
+MAX_CHAR = '\U0010ffff'  # sorts after anything that can follow a prefix
+POSITION_BITS = 28       # room for 268 million sessions
+POSITION_MASK = (1 << POSITION_BITS) - 1
+
+
+class HistoryIndex:
+    """Start-time and task-name indexes over a list of sessions
+
+    Sessions are referred to by position in the store's list. Every index
+    is a sorted array('q') of keys packing (start time, position), so a
+    time range is two bisects on one array: `keys` holds every session,
+    `by_task` the sessions of each task. Task names are also kept sorted by
+    their casefolded form, which turns a prefix into a range of names.
+    """
+
+    def __init__(self):
+        self.keys = array('q')
+        self.by_task = {}  # task -> sorted keys of its sessions
+        self.names = []    # sorted (casefolded task, task)
+
+    @classmethod
+    def build(cls, sessions):
+        index = cls()
+        by_task = {}
+        keys = []
+        for position, session in enumerate(sessions):
+            key = (session.start << POSITION_BITS) | position
+            keys.append(key)
+            task_keys = by_task.get(session.task)
+            if task_keys is None:
+                task_keys = by_task[session.task] = []
+            task_keys.append(key)
+        # Sessions are mostly saved in start order, so these sorts are cheap
+        index.keys = array('q', sorted(keys))
+        index.by_task = {task: array('q', sorted(task_keys)) for task, task_keys in by_task.items()}
+        index.names = sorted((task.casefold(), task) for task in by_task)
+        return index
+
+    def add(self, session, position):
+        """Index a session added to the list at `position`"""
+        key = (session.start << POSITION_BITS) | position
+        task_keys = self.by_task.get(session.task)
+        if task_keys is None:
+            task_keys = self.by_task[session.task] = array('q')
+            bisect.insort(self.names, (session.task.casefold(), session.task))
+        for keys in (self.keys, task_keys):
+            if not keys or key >= keys[-1]:
+                keys.append(key)
+            else:
+                keys.insert(bisect.bisect_right(keys, key), key)
+
+    def tasks(self, prefix):
+        """Task names starting with `prefix`, ignoring case"""
+        folded = prefix.casefold()
+        lo = bisect.bisect_left(self.names, (folded,))
+        hi = bisect.bisect_left(self.names, (folded + MAX_CHAR,))
+        return [task for _, task in self.names[lo:hi]]
+
+    def search(self, prefix='', start=None, end=None):
+        """Sorted runs of keys of the sessions whose task starts with
+        `prefix` and with start <= start time < end; None leaves a bound
+        open. There is one run per matching task (one in all without a
+        prefix); SearchResult pages through them without merging.
+        """
+        runs = [self.keys] if not prefix else [self.by_task[task] for task in self.tasks(prefix)]
+        low = None if start is None else start << POSITION_BITS
+        high = None if end is None else end << POSITION_BITS
+        slices = []
+        for keys in runs:
+            lo = 0 if low is None else bisect.bisect_left(keys, low)
+            hi = len(keys) if high is None else bisect.bisect_left(keys, high)
+            if lo < hi:
+                slices.append(keys[lo:hi])  # a copy, so later sessions don't change it
+        return slices
+
+
+class SearchResult:
+    """Sessions found by a history search, paged like HistoryStore.sessions
+
+    A page is cut from the sorted runs by rank: a binary search over key
+    values finds the keys at both ends of the page, then each run gives up
+    the keys between them. A page costs a few thousand bisects however
+    many sessions match.
+    """
+
+    def __init__(self, sessions, runs):
+        self._sessions = sessions
+        self.runs = runs
+        self._count = sum(len(run) for run in runs)
+
+    def count(self):
+        return self._count
+
+    def sessions(self, offset=0, limit=None):
+        """Matching sessions, latest start first"""
+        end = self._count - offset
+        start = 0 if limit is None else max(0, end - limit)
+        if start >= end:
+            return []
+        if len(self.runs) == 1:
+            keys = self.runs[0][start:end]
+        else:
+            low = self.key_at(start)
+            high = self.key_at(end) if end < self._count else None
+            keys = []
+            for run in self.runs:
+                hi = len(run) if high is None else bisect.bisect_left(run, high)
+                keys.extend(run[bisect.bisect_left(run, low):hi])
+            keys.sort()
+        return [self._sessions[key & POSITION_MASK] for key in reversed(keys)]
+
+    def key_at(self, rank):
+        """The key with exactly `rank` matching keys below it"""
+        low = min(run[0] for run in self.runs)
+        high = max(run[-1] for run in self.runs)
+        # Smallest key value with more than `rank` keys at or below it
+        while low < high:
+            middle = (low + high) // 2
+            if sum(bisect.bisect_right(run, middle) for run in self.runs) > rank:
+                high = middle
+            else:
+                low = middle + 1
+        return low
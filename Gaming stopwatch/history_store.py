@@ -0,0 +1,299 @@
+import json
+import os
+import sys
+import time
+
+from aggregates import HistoryAggregates
+from history_index import HistoryIndex, SearchResult
+from records import Session, day_start
+
+# How often appended sessions are forced to disk
+FSYNC_ALWAYS = 'always'      # after every session (default)
+FSYNC_INTERVAL = 'interval'  # at most once every fsync_interval seconds
+FSYNC_NEVER = 'never'        # leave it to the OS
+
+# File extensions that select the SQLite backend
+SQLITE_EXTENSIONS = ('.db', '.sqlite', '.sqlite3')
+# The single JSON list older versions kept history in; imported by load()
+LEGACY_FILE = 'task_history.json'
+
+
+def build_session(task, started_at, elapsed_ns, laps, extra=None):
+    """Build the history record for a finished session"""
+    return Session(sys.intern(task), int(started_at.timestamp()), elapsed_ns, laps, extra)
+
+
+def encode_line(session):
+    """One session as a line of the JSONL log"""
+    return json.dumps(session.to_dict(), separators=(',', ':')).encode('utf-8') + b'\n'
+
+
+def open_history_store(path, legacy_path=None):
+    """Open the history backend that matches the file extension
+
+    `legacy_path` is an old history list for load() to import; by default
+    LEGACY_FILE next to the history file.
+    """
+    if legacy_path is None:
+        legacy_path = os.path.join(os.path.dirname(os.path.abspath(path)), LEGACY_FILE)
+    if path.lower().endswith(SQLITE_EXTENSIONS):
+        from sqlite_store import SqliteHistoryStore
+        return SqliteHistoryStore(path, legacy_path)
+    return JsonlHistoryStore(path, legacy_path=legacy_path)
+
+
+class HistoryStore:
+    """Operations the GUI and tools use on stored session history"""
+
+    legacy_path = None
+
+    def load(self):
+        """Import any legacy history, then prepare stored history for use;
+        called once at startup"""
+        raise NotImplementedError
+
+    def add(self, session):
+        """Make a session visible to queries; write() stores it on disk"""
+        pass  # stores that query the disk see sessions once they're written
+
+    def write(self, sessions):
+        """Store sessions on disk as one batch
+
+        May run on a writer thread while the Tk thread queries the store.
+        """
+        raise NotImplementedError
+
+    def append(self, session):
+        """Add one finished session and write it right away"""
+        self.write([session])
+        self.add(session)
+
+    def forget(self):
+        """Drop every session from what queries see; erase() deletes them from disk"""
+        pass
+
+    def erase(self):
+        """Delete every stored session from disk"""
+        raise NotImplementedError
+
+    def clear(self):
+        """Remove every session"""
+        self.erase()
+        self.forget()
+
+    def close(self):
+        pass
+
+    def import_legacy(self):
+        """Move the sessions of an old history list at `legacy_path` into
+        the store, ahead of those already stored
+
+        The list is then renamed to *.imported, so it's only read once.
+        Returns whether there was anything to import.
+        """
+        if not self.legacy_path or not os.path.exists(self.legacy_path):
+            return False
+        with open(self.legacy_path, 'r') as f:
+            sessions = [Session.from_dict(data) for data in json.load(f)]
+        self.prepend(sessions)
+        os.replace(self.legacy_path, self.legacy_path + '.imported')
+        return True
+
+    def prepend(self, sessions):
+        """Store sessions as older than every stored one, skipping any
+        already stored (an import interrupted before the rename)"""
+        raise NotImplementedError
+
+    def iter_sessions(self):
+        """Yield every stored session, oldest first, without loading them all"""
+        raise NotImplementedError
+
+    def count(self):
+        """Number of stored sessions"""
+        raise NotImplementedError
+
+    def total_duration(self):
+        """Sum of all session durations, in seconds"""
+        raise NotImplementedError
+
+    def sessions(self, offset=0, limit=None):
+        """Return stored sessions, newest first"""
+        raise NotImplementedError
+
+    def totals_by_task(self, limit=None):
+        """Return (task, sessions, total seconds) tuples, most time first;
+        `limit` keeps only the first few"""
+        raise NotImplementedError
+
+    def totals_by_day(self, limit=None):
+        """Return (day, sessions, total seconds) tuples, newest day first;
+        `limit` keeps only the first few"""
+        raise NotImplementedError
+
+    def percentile(self, p, task=None):
+        """Duration percentile in seconds, overall or for one task"""
+        raise NotImplementedError
+
+    def search(self, task_prefix='', first_day=None, last_day=None):
+        """Sessions whose task starts with task_prefix (any case) and that
+        started between two 'YYYY-MM-DD' days, inclusive; any filter may be
+        left out. The result has count() and sessions(offset, limit) like
+        the store itself, but pages are in start time order, latest first.
+        """
+        raise NotImplementedError
+
+
+class JsonlHistoryStore(HistoryStore):
+    """Append-only session log with one JSON object per line
+
+    A stop appends a single line, so the cost of saving doesn't grow with
+    the history. A crash can at worst leave a partial last line, which
+    load() skips and the next append trims off.
+    """
+
+    def __init__(self, path, fsync=FSYNC_ALWAYS, fsync_interval=1.0, legacy_path=None):
+        self.path = path
+        self.legacy_path = legacy_path
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self.skipped_lines = 0
+        self._sessions = []
+        self._aggregates = HistoryAggregates()
+        self._index = HistoryIndex()
+        self._file = None
+        self._last_sync = 0.0
+
+    def iter_sessions(self):
+        """Yield stored sessions one at a time, skipping damaged lines"""
+        self.skipped_lines = 0
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'rb') as f:
+            for line in f:
+                try:
+                    yield Session.from_dict(json.loads(line))
+                except (ValueError, KeyError, TypeError, AttributeError):
+                    self.skipped_lines += 1
+
+    def load(self):
+        self.import_legacy()
+        self._sessions = list(self.iter_sessions())
+        self._aggregates = HistoryAggregates.build(
+            (s.task, s.day, s.duration) for s in self._sessions
+        )
+        self._index = HistoryIndex.build(self._sessions)
+
+    def count(self):
+        return len(self._sessions)
+
+    def total_duration(self):
+        return self._aggregates.overall.total
+
+    def sessions(self, offset=0, limit=None):
+        end = len(self._sessions) - offset
+        start = 0 if limit is None else max(0, end - limit)
+        return self._sessions[start:max(0, end)][::-1]
+
+    def totals_by_task(self, limit=None):
+        return self._aggregates.totals_by_task(limit)
+
+    def totals_by_day(self, limit=None):
+        return self._aggregates.totals_by_day(limit)
+
+    def percentile(self, p, task=None):
+        return self._aggregates.percentile(p, task)
+
+    def search(self, task_prefix='', first_day=None, last_day=None):
+        """Answered from the in-memory task and start-time indexes"""
+        runs = self._index.search(
+            task_prefix,
+            day_start(first_day) if first_day else None,
+            day_start(last_day, days_after=1) if last_day else None
+        )
+        return SearchResult(self._sessions, runs)
+
+    def add(self, session):
+        self._sessions.append(session)
+        self._aggregates.add(session.task, session.day, session.duration)
+        self._index.add(session, len(self._sessions) - 1)
+
+    def write(self, sessions):
+        """Append sessions to the end of the log with a single flush"""
+        f = self._writer()
+        f.write(b''.join(encode_line(session) for session in sessions))
+        f.flush()
+        if self.fsync == FSYNC_ALWAYS:
+            os.fsync(f.fileno())
+        elif self.fsync == FSYNC_INTERVAL:
+            now = time.monotonic()
+            if now - self._last_sync >= self.fsync_interval:
+                os.fsync(f.fileno())
+                self._last_sync = now
+
+    def rewrite(self, sessions):
+        """Replace the log with the given sessions via an atomic rename"""
+        self.close()
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            for session in sessions:
+                f.write(encode_line(session))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def forget(self):
+        self._sessions = []
+        self._aggregates.clear()
+        self._index = HistoryIndex()
+
+    def erase(self):
+        self.rewrite([])
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def prepend(self, sessions):
+        stored = list(self.iter_sessions())
+        known = {(s.task, s.start, s.duration_ns) for s in stored}
+        self.rewrite([s for s in sessions if (s.task, s.start, s.duration_ns) not in known] + stored)
+
+    def _writer(self):
+        if self._file is None:
+            self._trim_partial_line()
+            self._file = open(self.path, 'ab')
+        return self._file
+
+    def _trim_partial_line(self):
+        # Make sure the next record starts on a line of its own. A last line
+        # without a newline is cut off if it's half-written; a complete
+        # record (say, written by hand) just gets its newline
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'rb+') as f:
+            size = f.seek(0, os.SEEK_END)
+            if size == 0:
+                return
+            f.seek(size - 1)
+            if f.read(1) == b'\n':
+                return
+            # Walk back to the previous newline
+            start = 0
+            pos = size
+            while pos > 0:
+                step = min(4096, pos)
+                f.seek(pos - step)
+                newline = f.read(step).rfind(b'\n')
+                if newline >= 0:
+                    start = pos - step + newline + 1
+                    break
+                pos -= step
+            f.seek(start)
+            try:
+                Session.from_dict(json.loads(f.read(size - start)))
+            except (ValueError, KeyError, TypeError, AttributeError):
+                f.truncate(start)
+            else:
+                f.seek(size)
+                f.write(b'\n')
@@ -0,0 +1,115 @@
+import tkinter as tk
+import tkinter.font as tkfont
+from collections import OrderedDict
+
+
+class VirtualListView:
+    """A scrollable list that only builds and holds the rows on screen
+
+    `fetch_rows(offset, limit)` returns the formatted rows for a range.
+    Rows are fetched a page at a time as the user scrolls and a few recent
+    pages are cached, so opening the view costs the same for ten rows or a
+    million. `placeholder` is shown in place of the rows while there are
+    none.
+    """
+
+    def __init__(self, parent, fetch_rows, total, placeholder="", page_size=100, cached_pages=8,
+                 **listbox_options):
+        self.fetch_rows = fetch_rows
+        self.total = total
+        self.placeholder = placeholder
+        self.page_size = page_size
+        self.cached_pages = cached_pages
+        self.top = 0
+        self.visible = 1
+        self._pages = OrderedDict()
+
+        self.scrollbar = tk.Scrollbar(parent, command=self.yview)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        self.listbox = tk.Listbox(parent, **listbox_options)
+        self.listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        font = tkfont.Font(font=self.listbox.cget('font'))
+        self.line_height = font.metrics('linespace') + 1
+
+        self.listbox.bind('<Configure>', self.on_resize)
+        self.listbox.bind('<MouseWheel>', self.on_mousewheel)
+        self.listbox.bind('<Button-4>', lambda event: self.scroll(-3))
+        self.listbox.bind('<Button-5>', lambda event: self.scroll(3))
+        self.render()
+
+    def reload(self, fetch_rows, total, placeholder=""):
+        """Point the view at a different set of rows and scroll to the top"""
+        self.fetch_rows = fetch_rows
+        self.total = total
+        self.placeholder = placeholder
+        self.top = 0
+        self._pages.clear()
+        self.render()
+
+    def on_resize(self, event):
+        visible = max(1, event.height // self.line_height)
+        if visible != self.visible:
+            self.visible = visible
+            self.render()
+
+    def on_mousewheel(self, event):
+        # Windows reports multiples of 120 per notch, macOS small integers
+        step = event.delta // 120 if abs(event.delta) >= 120 else event.delta
+        self.scroll(-3 * step)
+
+    def yview(self, *args):
+        """Scrollbar callback: ('moveto', fraction) or ('scroll', n, what)"""
+        if args[0] == 'moveto':
+            self.top = int(float(args[1]) * self.total)
+        elif args[0] == 'scroll':
+            amount = int(args[1])
+            if args[2] == 'pages':
+                amount *= self.visible
+            self.top += amount
+        self.render()
+
+    def scroll(self, rows):
+        self.top += rows
+        self.render()
+
+    def render(self):
+        """Show rows top .. top + visible, fetching pages as needed"""
+        self.top = max(0, min(self.top, self.total - self.visible))
+        end = min(self.total, self.top + self.visible)
+        rows = self.rows(self.top, end)
+
+        self.listbox.delete(0, tk.END)
+        if rows:
+            self.listbox.insert(tk.END, *rows)
+        elif not self.total and self.placeholder:
+            self.listbox.insert(tk.END, self.placeholder)
+        if self.total:
+            self.scrollbar.set(self.top / self.total, end / self.total)
+        else:
+            self.scrollbar.set(0, 1)
+
+    def rows(self, start, end):
+        rows = []
+        index = start
+        while index < end:
+            page_index = index // self.page_size
+            page = self.page(page_index)
+            offset = index - page_index * self.page_size
+            take = min(end - index, len(page) - offset)
+            if take <= 0:
+                break
+            rows.extend(page[offset:offset + take])
+            index += take
+        return rows
+
+    def page(self, page_index):
+        page = self._pages.get(page_index)
+        if page is None:
+            page = self.fetch_rows(page_index * self.page_size, self.page_size)
+            self._pages[page_index] = page
+            if len(self._pages) > self.cached_pages:
+                self._pages.popitem(last=False)
+        else:
+            self._pages.move_to_end(page_index)
+        return page
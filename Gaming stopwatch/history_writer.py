@@ -0,0 +1,140 @@
+import queue
+import threading
+import time
+
+from metrics import Histogram
+
+
+class HistoryWriter:
+    """Write finished sessions to a history store on a background thread
+
+    submit() adds the session to the store's in-memory view right away and
+    queues the disk write, so the Tk thread never waits on file I/O. The
+    writer takes everything queued within `linger` seconds of the first
+    item and writes it as one batch with a single flush (one fsync for a
+    burst of stops). Other disk work that has to happen in order with the
+    writes, like clearing history, goes through the same queue.
+    """
+
+    def __init__(self, store, linger=0.01, latency=None, clock=time.perf_counter_ns):
+        self.store = store
+        self.linger = linger
+        self.clock = clock
+        # Time from submit() until the session is written, in ns
+        self.latency = latency if latency is not None else Histogram()
+        self.written = 0
+        self.batches = 0
+        self.largest_batch = 0
+        self.max_depth = 0
+        self.errors = queue.Queue()
+        self._queue = queue.Queue()  # (submitted at, Session or callable), None to stop
+        self._thread = threading.Thread(target=self._run, name="history-writer", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    @property
+    def depth(self):
+        """Writes and tasks queued but not yet finished"""
+        return self._queue.unfinished_tasks
+
+    def submit(self, session):
+        """Add a session to the store now and write it in the background"""
+        self.store.add(session)
+        self._put(session)
+
+    def call(self, work):
+        """Run `work` on the writer thread once everything queued before it is written"""
+        self._put(work)
+
+    def clear(self, also=None):
+        """Clear the history; `also` runs afterwards on the writer thread"""
+        self.store.forget()
+        self._put(self.store.erase)
+        if also is not None:
+            self._put(also)
+
+    def flush(self):
+        """Wait until everything queued so far is on disk"""
+        self._queue.join()
+
+    def close(self):
+        """Write everything still queued and stop the thread"""
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+
+    def drain_errors(self):
+        """Return errors raised on the writer thread since the last call"""
+        errors = []
+        while True:
+            try:
+                errors.append(self.errors.get_nowait())
+            except queue.Empty:
+                return errors
+
+    def stats(self):
+        """Counts, queue depth and write latency in milliseconds"""
+        summary = self.latency.summary()
+        return {
+            'written': self.written,
+            'batches': self.batches,
+            'largest_batch': self.largest_batch,
+            'depth': self.depth,
+            'max_depth': self.max_depth,
+            'latency_p50_ms': summary['p50_ms'],
+            'latency_p99_ms': summary['p99_ms'],
+            'latency_max_ms': summary['max_ms']
+        }
+
+    def _put(self, item):
+        self._queue.put((self.clock(), item))
+        self.max_depth = max(self.max_depth, self._queue.unfinished_tasks)
+
+    def _run(self):
+        while True:
+            items = [self._queue.get()]
+            # Let a burst of submits arrive before writing
+            deadline = time.monotonic() + self.linger
+            while items[-1] is not None:
+                try:
+                    items.append(self._queue.get(timeout=max(0.0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+            self._process(items)
+            for _ in items:
+                self._queue.task_done()
+            if items[-1] is None:
+                return
+
+    def _process(self, items):
+        batch = []
+        for item in items:
+            if item is None:
+                break
+            submitted, work = item
+            if callable(work):
+                self._write(batch)
+                batch = []
+                try:
+                    work()
+                except Exception as e:
+                    self.errors.put(e)
+            else:
+                batch.append(item)
+        self._write(batch)
+
+    def _write(self, batch):
+        if not batch:
+            return
+        try:
+            self.store.write([session for _, session in batch])
+        except Exception as e:
+            self.errors.put(e)
+            return
+        now = self.clock()
+        for submitted, _ in batch:
+            self.latency.record(now - submitted)
+        self.written += len(batch)
+        self.batches += 1
+        self.largest_batch = max(self.largest_batch, len(batch))
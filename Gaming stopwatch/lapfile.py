@@ -0,0 +1,249 @@
+"""Per-session lap files: every lap offset as a little-endian int64 of ns.
+
+A lap file is MAGIC followed by one 8-byte offset (time since the session
+started) per lap. Laps are appended as they are recorded, so stopping a
+session only closes the file, and history records just name the file.
+Reading memory-maps it instead of loading it.
+"""
+import mmap
+import os
+import secrets
+import struct
+import sys
+from array import array
+
+MAGIC = b'STWLAP1\0'
+HEADER_SIZE = len(MAGIC)
+LAP = struct.Struct('<q')
+LAP_FILE_KEY = 'lap_file'  # Session.extra key holding the file name
+# Per-session files kept in a LapStore's folder: laps, and resource samples
+# (see sampler.py)
+SESSION_FILE_EXTENSIONS = ('.laps', '.res')
+
+
+class LapWriter:
+    """Streams one session's lap offsets to its lap file
+
+    File work is handed to `run`, which by default does it right away; the
+    GUI passes one that queues it for its history writer thread, so the Tk
+    thread never waits on the disk. The lap count is kept up to date here.
+    """
+
+    def __init__(self, path, name, run=None):
+        self.path = path
+        self.name = name
+        self.count = 0
+        self._run = run or _run_now
+        self._file = None  # stays None if the file can't be created
+        self._run(self._create)
+
+    @classmethod
+    def reopen(cls, path, name, run=None):
+        """Append to an existing lap file, e.g. of a session resumed after a crash
+
+        Opening happens right away, since the caller needs to know it worked.
+        """
+        writer = cls.__new__(cls)
+        writer.path = path
+        writer.name = name
+        writer._run = run or _run_now
+        writer._file = open(path, 'r+b')
+        size = os.fstat(writer._file.fileno()).st_size
+        if writer._file.read(HEADER_SIZE) != MAGIC:
+            writer._file.close()
+            raise ValueError(f"not a lap file: {path}")
+        # Drop a partly written last lap before appending after it
+        writer.count = (size - HEADER_SIZE) // LAP.size
+        writer._file.truncate(HEADER_SIZE + writer.count * LAP.size)
+        writer._file.seek(0, os.SEEK_END)
+        return writer
+
+    def append(self, lap_ns):
+        data = LAP.pack(lap_ns)
+        self.count += 1
+        self._run(lambda: self._write(data))
+
+    def extend(self, laps_ns):
+        """Write laps recorded before this writer was attached"""
+        data = array('q', laps_ns)
+        if sys.byteorder == 'big':
+            data.byteswap()
+        self.count += len(data)
+        if data:
+            data = data.tobytes()
+            self._run(lambda: self._write(data))
+
+    def close(self):
+        self._run(self._close)
+
+    def discard(self):
+        """Close and delete the file (the session wasn't kept)"""
+        self._run(self._discard)
+
+    def _create(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._file = open(self.path, 'wb')
+        self._file.write(MAGIC)
+        self._file.flush()
+
+    def _write(self, data):
+        if self._file is None or self._file.closed:
+            return
+        self._file.write(data)
+        self._file.flush()  # a crash loses at most the lap being written
+
+    def _close(self):
+        if self._file is not None and not self._file.closed:
+            self._file.close()
+
+    def _discard(self):
+        self._close()
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+def _run_now(work):
+    work()
+
+
+class LapFile:
+    """Read-only, memory-mapped view of a lap file"""
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[:HEADER_SIZE] != MAGIC:
+            self._map.close()
+            raise ValueError(f"not a lap file: {path}")
+        # A partly written last lap (crash mid-write) is ignored
+        self._count = (len(self._map) - HEADER_SIZE) // LAP.size
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("lap index out of range")
+        return LAP.unpack_from(self._map, HEADER_SIZE + index * LAP.size)[0]
+
+    def __iter__(self):
+        return (lap_ns for (lap_ns,) in LAP.iter_unpack(self._map[HEADER_SIZE:HEADER_SIZE + self._count * LAP.size]))
+
+    def offsets(self):
+        """All lap offsets as an array('q')"""
+        laps = array('q', self._map[HEADER_SIZE:HEADER_SIZE + self._count * LAP.size])
+        if sys.byteorder == 'big':
+            laps.byteswap()
+        return laps
+
+    def splits(self):
+        """Time between consecutive laps (the first from the start)"""
+        previous = 0
+        for lap_ns in self:
+            yield lap_ns - previous
+            previous = lap_ns
+
+    def close(self):
+        self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class LapStore:
+    """The folder of lap files (and other per-session files) belonging to one history file"""
+
+    def __init__(self, directory, run=None):
+        self.directory = directory
+        self.run = run  # how lap writers do their file work (see LapWriter)
+
+    @classmethod
+    def for_history(cls, history_path, run=None):
+        """Lap files live in a 'laps' folder next to the history file"""
+        return cls(os.path.join(os.path.dirname(os.path.abspath(history_path)), 'laps'), run)
+
+    def new_file(self, started_at, extension):
+        """(path, name) for a new file of a session started at `started_at` (a datetime);
+        the folder is created by whoever writes the file"""
+        name = f"{started_at:%Y%m%d-%H%M%S}-{secrets.token_hex(4)}{extension}"
+        return os.path.join(self.directory, name), name
+
+    def writer(self, started_at):
+        """Create a lap file for a session started at `started_at` (a datetime)"""
+        return LapWriter(*self.new_file(started_at, '.laps'), run=self.run)
+
+    def attach(self, engine, started_at):
+        """Stream an engine's laps (including any it already has) to a new file
+
+        Returns False if the file can't be created; timing carries on
+        without lap data in that case. With queued file work the failure
+        only shows up later, where `run` reports errors.
+        """
+        if engine.lap_sink is not None:
+            return True
+        try:
+            writer = self.writer(started_at)
+            writer.extend(engine.laps)
+        except OSError:
+            return False
+        engine.lap_sink = writer
+        return True
+
+    def reopen(self, engine, name):
+        """Continue streaming an engine's laps to an existing lap file
+
+        Returns the laps already in the file (array('q')), or None if it
+        can't be reopened; the engine has no lap writer then.
+        """
+        path = os.path.join(self.directory, os.path.basename(name))
+        try:
+            with LapFile(path) as laps:
+                offsets = laps.offsets()
+            engine.lap_sink = LapWriter.reopen(path, os.path.basename(name), self.run)
+        except (OSError, ValueError):
+            return None
+        return offsets
+
+    def open(self, session):
+        """Memory-map a session's lap file, or return None if it has none"""
+        name = (session.extra or {}).get(LAP_FILE_KEY)
+        if not name:
+            return None
+        return LapFile(os.path.join(self.directory, os.path.basename(name)))
+
+    def clear(self, keep=()):
+        """Delete every session file except those named in `keep` (still being written)"""
+        if not os.path.isdir(self.directory):
+            return
+        keep = set(keep)
+        for name in os.listdir(self.directory):
+            if name.endswith(SESSION_FILE_EXTENSIONS) and name not in keep:
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass
+
+
+def finish(engine, session):
+    """Detach an engine's lap writer and reference its file from the session
+
+    The file is kept only if the session is being saved and has laps;
+    pass session=None when the run is thrown away.
+    """
+    writer, engine.lap_sink = engine.lap_sink, None
+    if writer is None:
+        return
+    if session is None or not writer.count:
+        writer.discard()
+        return
+    writer.close()
+    if session.extra is None:
+        session.extra = {}
+    session.extra[LAP_FILE_KEY] = writer.name
@@ -0,0 +1,196 @@
+"""Timing counters and histograms for the app's hot paths.
+
+Profiling is off unless STOPWATCH_PROFILE is set (to a file the metrics are
+dumped to on exit, or to 1 for the default file). When it is off nothing is
+wrapped, so the instrumented methods run exactly as before.
+"""
+import functools
+import json
+import os
+import threading
+import time
+from array import array
+from datetime import datetime
+
+from timing import NS_PER_SECOND
+
+PROFILE_ENV = 'STOPWATCH_PROFILE'
+DEFAULT_DUMP = "stopwatch_metrics.json"
+
+# Values below 16 ns get a bucket each; above that every power of two is
+# split into 8 buckets, so a bucket is never more than 12.5% wide
+SUB_BUCKETS = 8
+BUCKETS = 512
+
+
+def bucket_index(value):
+    if value < 2 * SUB_BUCKETS:
+        return max(0, value)
+    shift = value.bit_length() - 4
+    return (shift << 3) + (value >> shift)
+
+
+def bucket_bounds(index):
+    """Smallest and largest value that land in a bucket"""
+    if index < 2 * SUB_BUCKETS:
+        return index, index
+    shift = (index >> 3) - 1
+    mantissa = index - (shift << 3)
+    return mantissa << shift, ((mantissa + 1) << shift) - 1
+
+
+class Histogram:
+    """Count, total, max and a log-linear histogram of nanosecond values"""
+
+    __slots__ = ('count', 'total', 'max', 'buckets', '_lock')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0
+        self.max = 0
+        self.buckets = array('q', bytes(8 * BUCKETS))
+        self._lock = threading.Lock()  # scans are timed off the Tk thread
+
+    def record(self, value):
+        with self._lock:
+            self.count += 1
+            self.total += value
+            if value > self.max:
+                self.max = value
+            self.buckets[bucket_index(value)] += 1
+
+    def percentile(self, p):
+        """Upper bound of the bucket holding the p-th percentile, in ns"""
+        if not self.count:
+            return 0
+        rank = max(1, -(-self.count * p // 100))
+        seen = 0
+        for index, hits in enumerate(self.buckets):
+            seen += hits
+            if seen >= rank:
+                return min(bucket_bounds(index)[1], self.max)
+        return self.max
+
+    def summary(self):
+        """Milliseconds, JSON-friendly"""
+        to_ms = lambda ns: round(ns / 1e6, 3)
+        return {
+            'count': self.count,
+            'total_ms': to_ms(self.total),
+            'mean_ms': to_ms(self.total / self.count) if self.count else 0.0,
+            'p50_ms': to_ms(self.percentile(50)),
+            'p90_ms': to_ms(self.percentile(90)),
+            'p99_ms': to_ms(self.percentile(99)),
+            'max_ms': to_ms(self.max),
+            'buckets': [[bucket_bounds(index)[0], hits] for index, hits in enumerate(self.buckets) if hits]
+        }
+
+
+class Metrics:
+    """Named histograms plus helpers to time functions into them"""
+
+    def __init__(self, dump_path=DEFAULT_DUMP, clock=time.perf_counter_ns):
+        self.dump_path = dump_path
+        self.clock = clock
+        self.histograms = {}
+        self.started = clock()
+
+    @classmethod
+    def from_environment(cls):
+        """A Metrics if STOPWATCH_PROFILE is set, otherwise None"""
+        value = os.environ.get(PROFILE_ENV)
+        if not value or value == '0':
+            return None
+        return cls(DEFAULT_DUMP if value == '1' else value)
+
+    def histogram(self, name):
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms.setdefault(name, Histogram())
+        return histogram
+
+    def recorder(self, name):
+        """The record function of one histogram, for code that reports values itself"""
+        return self.histogram(name).record
+
+    def timed(self, func, name=None):
+        """Wrap func so every call's duration is recorded"""
+        record = self.recorder(name or func.__name__)
+        clock = self.clock
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = clock()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(clock() - started)
+        return wrapper
+
+    def instrument(self, obj, names):
+        """Replace methods on one instance with timed wrappers
+
+        Must run before the bound methods are handed out (to Tk commands,
+        threads or schedulers), or those copies stay untimed.
+        """
+        for name in names:
+            setattr(obj, name, self.timed(getattr(obj, name), name))
+
+    def reset(self):
+        for histogram in list(self.histograms.values()):
+            with histogram._lock:
+                histogram.count = histogram.total = histogram.max = 0
+                histogram.buckets = array('q', bytes(8 * BUCKETS))
+        self.started = self.clock()
+
+    def snapshot(self):
+        return {name: histogram.summary() for name, histogram in sorted(self.histograms.items())}
+
+    def report(self):
+        """Text table of every histogram, for the profiler window"""
+        lines = [f"{'metric':<28}{'count':>8}{'mean':>9}{'p50':>9}{'p99':>9}{'max':>9}  (ms)"]
+        for name, summary in self.snapshot().items():
+            lines.append(f"{name:<28}{summary['count']:>8}{summary['mean_ms']:>9.2f}"
+                         f"{summary['p50_ms']:>9.2f}{summary['p99_ms']:>9.2f}{summary['max_ms']:>9.2f}")
+        return "\n".join(lines)
+
+    def dump(self, path=None):
+        """Write every histogram to a JSON file; returns the path"""
+        path = path or self.dump_path
+        data = {
+            'written_at': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            'window_s': round((self.clock() - self.started) / NS_PER_SECOND, 3),
+            'metrics': self.snapshot()
+        }
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2)
+        return path
+
+
+class LagMonitor:
+    """Measure Tk event-loop lag: how late a short after() callback fires"""
+
+    def __init__(self, root, record, interval_ms=50, clock=time.perf_counter_ns):
+        self.root = root
+        self.record = record
+        self.interval_ms = interval_ms
+        self.clock = clock
+        self._due = None
+        self._after_id = None
+
+    def start(self):
+        if self._after_id is None:
+            self._schedule()
+
+    def stop(self):
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+
+    def _schedule(self):
+        self._due = self.clock() + self.interval_ms * 1_000_000
+        self._after_id = self.root.after(self.interval_ms, self._probe)
+
+    def _probe(self):
+        self.record(max(0, self.clock() - self._due))
+        self._schedule()
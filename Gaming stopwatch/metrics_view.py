@@ -0,0 +1,58 @@
+import tkinter as tk
+from tkinter import messagebox
+
+
+class ProfilerWindow:
+    """Debug window showing live hot-path timings and event-loop lag"""
+
+    REFRESH_MS = 500
+
+    def __init__(self, root, metrics):
+        self.metrics = metrics
+        self.window = tk.Toplevel(root)
+        self.window.title("Profiler")
+        self.window.geometry("640x320")
+        self.window.configure(bg='#1a1a1a')
+
+        self.text = tk.Text(
+            self.window,
+            font=("Courier", 9),
+            bg='#2a2a2a',
+            fg='#00ff00',
+            relief=tk.FLAT,
+            height=14
+        )
+        self.text.pack(fill=tk.BOTH, expand=True, padx=10, pady=(10, 5))
+
+        btn_frame = tk.Frame(self.window, bg='#1a1a1a')
+        btn_frame.pack(pady=(0, 10))
+        tk.Button(btn_frame, text="Dump to file", command=self.dump,
+                  bg='#0066cc', fg='white', relief=tk.RAISED, bd=2).pack(side=tk.LEFT, padx=5)
+        tk.Button(btn_frame, text="Reset", command=self.reset,
+                  bg='#cc6600', fg='white', relief=tk.RAISED, bd=2).pack(side=tk.LEFT, padx=5)
+
+        self.refresh()
+
+    def refresh(self):
+        if not self.window.winfo_exists():
+            return
+        self.render()
+        self.window.after(self.REFRESH_MS, self.refresh)
+
+    def dump(self):
+        try:
+            path = self.metrics.dump()
+        except OSError as e:
+            messagebox.showerror("Profiler", f"Could not write metrics:\n{e}", parent=self.window)
+            return
+        messagebox.showinfo("Profiler", f"Metrics written to {path}", parent=self.window)
+
+    def reset(self):
+        self.metrics.reset()
+        self.render()
+
+    def render(self):
+        self.text.config(state=tk.NORMAL)
+        self.text.delete('1.0', tk.END)
+        self.text.insert(tk.END, self.metrics.report())
+        self.text.config(state=tk.DISABLED)
@@ -0,0 +1,123 @@
+import sys
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+
+from timing import NS_PER_SECOND
+
+# Keys of a stored session that map onto Session fields; any other key
+# (resource samples, etc.) is kept in Session.extra
+FIELDS = frozenset(('task', 'start', 'duration_ns', 'laps'))
+# Older records: string start time, float seconds, a pre-formatted copy of
+# the duration, and 'game' instead of 'task' in the oldest files
+LEGACY_FIELDS = frozenset(('task', 'game', 'start_time', 'duration', 'duration_formatted', 'laps'))
+
+EPOCH_DATE = date(1970, 1, 1)
+CACHE_LIMIT = 100_000
+_day_names = {}    # quarter hour since the epoch -> local day
+_hour_starts = {}  # local 'YYYY-MM-DD HH' -> epoch seconds
+
+
+@dataclass
+class Session:
+    """One finished session, kept as plain integers
+
+    `start` is Unix epoch seconds and `duration_ns` whole nanoseconds; the
+    readable start time, day and duration are derived only when shown.
+    Task names are interned, so a large history holds each name once.
+    """
+
+    __slots__ = ('task', 'start', 'duration_ns', 'laps', 'extra')
+
+    task: str
+    start: int
+    duration_ns: int
+    laps: int
+    extra: dict  # other stored keys, or None
+
+    @property
+    def duration(self):
+        """Duration in seconds"""
+        return self.duration_ns / NS_PER_SECOND
+
+    @property
+    def start_time(self):
+        """Local start time as 'YYYY-MM-DD HH:MM:SS'"""
+        return time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(self.start))
+
+    @property
+    def day(self):
+        """Local calendar day ('YYYY-MM-DD') the session started on"""
+        return local_day(self.start)
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build from a stored record in the current or any older format"""
+        if 'duration_ns' in data:
+            task = data['task']
+            start = data['start']
+            duration_ns = data['duration_ns']
+            fields = FIELDS
+        else:
+            task = data.get('task', data.get('game', 'Unknown'))
+            start = parse_start_time(data['start_time'])
+            duration_ns = round(data['duration'] * NS_PER_SECOND)
+            fields = LEGACY_FIELDS
+        extra = None
+        if not data.keys() <= fields:
+            extra = {key: value for key, value in data.items() if key not in fields}
+        return cls(sys.intern(task), start, duration_ns, data.get('laps', 0), extra)
+
+    def to_dict(self):
+        """Compact JSON-ready record"""
+        data = {'task': self.task, 'start': self.start, 'duration_ns': self.duration_ns, 'laps': self.laps}
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+
+def parse_start_time(text):
+    """Local 'YYYY-MM-DD HH:MM:SS' as Unix epoch seconds"""
+    # Old histories repeat the same hours a lot, and the local offset only
+    # changes on the hour, so only 'YYYY-MM-DD HH' goes through datetime
+    hour = text[:13]
+    start = _hour_starts.get(hour)
+    if start is None:
+        start = int(datetime.fromisoformat(hour + ':00:00').timestamp())
+        if len(_hour_starts) < CACHE_LIMIT:
+            _hour_starts[hour] = start
+    if len(text) < 19:
+        return start
+    return start + int(text[14:16]) * 60 + int(text[17:19])
+
+
+def parse_day(text):
+    """'YYYY-MM-DD' as typed, normalized, or None if it isn't a date yet"""
+    try:
+        return date.fromisoformat(text.strip()).isoformat()
+    except ValueError:
+        return None
+
+
+def day_start(day, days_after=0):
+    """Unix epoch seconds of local midnight starting 'YYYY-MM-DD' (or `days_after` days later)"""
+    return int(datetime.combine(date.fromisoformat(day) + timedelta(days=days_after), datetime.min.time()).timestamp())
+
+
+def local_seconds(epoch):
+    """Unix epoch seconds shifted to local wall-clock seconds since 1970"""
+    return epoch + time.localtime(epoch).tm_gmtoff
+
+
+def local_day(epoch):
+    """Local calendar day of an epoch time as 'YYYY-MM-DD'"""
+    # Time zone offsets and DST changes fall on quarter hours, so every
+    # epoch in the same quarter hour has the same local day
+    quarter = epoch // 900
+    name = _day_names.get(quarter)
+    if name is None:
+        day_number = local_seconds(quarter * 900) // 86400
+        name = (EPOCH_DATE + timedelta(days=day_number)).isoformat()
+        if len(_day_names) < CACHE_LIMIT:
+            _day_names[quarter] = name
+    return name
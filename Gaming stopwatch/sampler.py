@@ -0,0 +1,153 @@
+"""Resource sampling of a tracked app, streamed to a per-session file.
+
+A resource file is MAGIC, the sampling interval (a little-endian double of
+seconds), then one fixed-size SAMPLE record per sample: milliseconds since
+sampling started, CPU percent summed over the process tree (can exceed
+100), RSS bytes, and cumulative read and write bytes (0 where unsupported).
+Samples are appended as they are taken, so a long session holds nothing in
+memory and its history record just names the file.
+"""
+import os
+import struct
+import threading
+import time
+from array import array
+
+MAGIC = b'STWRES1\0'
+HEADER = struct.Struct('<d')
+SAMPLE = struct.Struct('<qfqqq')
+RESOURCE_FILE_KEY = 'resource_file'  # Session.extra key holding the file name
+# Rescan the process tree for new children every this many samples
+TREE_REFRESH_SAMPLES = 10
+
+
+class ResourceSampler:
+    """Sample CPU, memory and I/O of a process tree on a background thread
+
+    Each sample is appended to the file at `path` (created with the first
+    one) by the sampling thread.
+    """
+
+    def __init__(self, pid, path, name, interval=2.0):
+        self.pid = pid
+        self.path = path
+        self.name = name
+        self.interval = interval
+        self.count = 0
+        self._file = None
+        self._procs = {}
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="resource-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        """Stop sampling and wait for the thread to finish"""
+        self._stopped.set()
+        self._thread.join()
+        if self._file is not None:
+            self._file.close()
+
+    def finish(self, session):
+        """Stop, then reference the file from the session, or delete it if
+        the session isn't saved (None) or has no samples"""
+        self.stop()
+        if session is None or not self.count:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+            return
+        if session.extra is None:
+            session.extra = {}
+        session.extra[RESOURCE_FILE_KEY] = self.name
+
+    def _run(self):
+        started = time.monotonic()
+        if not self._refresh_tree():
+            return  # the tracked process is gone
+        # The first sample waits an interval, so CPU use has a baseline
+        while not self._stopped.wait(self.interval):
+            try:
+                self._sample(started)
+            except OSError:
+                return  # can't write the file; timing carries on without samples
+            if self.count % TREE_REFRESH_SAMPLES == 0 and not self._refresh_tree():
+                return
+
+    def _refresh_tree(self):
+        import psutil
+        # Keep existing Process objects so cpu_percent() has a baseline
+        try:
+            root = self._procs.get(self.pid) or psutil.Process(self.pid)
+            tree = [root] + root.children(recursive=True)
+        except psutil.Error:
+            return False
+        procs = {}
+        for proc in tree:
+            known = self._procs.get(proc.pid)
+            if known is None:
+                # Prime it; the first call only records a starting point
+                try:
+                    proc.cpu_percent(None)
+                except psutil.Error:
+                    continue
+            procs[proc.pid] = known or proc
+        self._procs = procs
+        return True
+
+    def _sample(self, started):
+        import psutil
+        cpu = 0.0
+        rss = read = write = 0
+        for pid, proc in list(self._procs.items()):
+            try:
+                with proc.oneshot():
+                    cpu += proc.cpu_percent(None)
+                    rss += proc.memory_info().rss
+                    if hasattr(proc, 'io_counters'):
+                        try:
+                            io = proc.io_counters()
+                            read += io.read_bytes
+                            write += io.write_bytes
+                        except psutil.AccessDenied:
+                            pass
+            except psutil.Error:
+                del self._procs[pid]
+        if self._file is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._file = open(self.path, 'wb')
+            self._file.write(MAGIC + HEADER.pack(self.interval))
+        offset_ms = int((time.monotonic() - started) * 1000)
+        self._file.write(SAMPLE.pack(offset_ms, cpu, rss, read, write))
+        self._file.flush()  # a crash loses at most the sample being written
+        self.count += 1
+
+
+def read_samples(path):
+    """The interval and samples of a resource file, column-wise in arrays
+
+    Returns (interval, columns) with columns keyed 'offset_ms',
+    'cpu_percent', 'rss', 'read_bytes' and 'write_bytes'. A partly written
+    last sample is ignored.
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    if data[:len(MAGIC)] != MAGIC:
+        raise ValueError(f"not a resource file: {path}")
+    (interval,) = HEADER.unpack_from(data, len(MAGIC))
+    start = len(MAGIC) + HEADER.size
+    end = start + (len(data) - start) // SAMPLE.size * SAMPLE.size
+    columns = {
+        'offset_ms': array('q'),
+        'cpu_percent': array('f'),
+        'rss': array('q'),
+        'read_bytes': array('q'),
+        'write_bytes': array('q')
+    }
+    appends = [column.append for column in columns.values()]
+    for sample in SAMPLE.iter_unpack(data[start:end]):
+        for append, value in zip(appends, sample):
+            append(value)
+    return interval, columns
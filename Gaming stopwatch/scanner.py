@@ -0,0 +1,121 @@
+import queue
+import threading
+from collections import namedtuple
+
+# Changes between two scans: added maps app name -> process info,
+# removed is the set of app names that no longer have a live process, and
+# republished the names in added that were already running (the process
+# handed out before exited, another one of the app is still alive)
+AppDiff = namedtuple('AppDiff', ['added', 'removed', 'republished'], defaults=(frozenset(),))
+
+
+class ProcessCache:
+    """Remember classified processes between scans, keyed by (pid, create_time)"""
+
+    def __init__(self, classify):
+        self.classify = classify
+        self.entries = {}    # (pid, create_time) -> app name, or None if not an app
+        self.instances = {}  # app name -> {(pid, create_time): info}
+        self.published = {}  # app name -> key of the info last handed out
+        self._lock = threading.Lock()  # instances_of() is called from other threads
+
+    def instances_of(self, name):
+        """Infos of every known process of an app, as of the last scan"""
+        with self._lock:
+            return list(self.instances.get(name, {}).values())
+
+    def update(self, procs):
+        """Classify only new processes, forget exited ones and return the diff"""
+        with self._lock:
+            return self._update(procs)
+
+    def _update(self, procs):
+        seen = set()
+        added = {}
+        for proc in procs:
+            info = proc.info
+            key = (info.get('pid'), info.get('create_time'))
+            seen.add(key)
+            if key in self.entries:
+                continue
+
+            name = self.classify(proc)
+            self.entries[key] = name
+            if name is None:
+                continue
+            procs_for_app = self.instances.setdefault(name, {})
+            if not procs_for_app:
+                added[name] = info
+                self.published[name] = key
+            procs_for_app[key] = info
+
+        removed = set()
+        republished = set()
+        for key in self.entries.keys() - seen:
+            name = self.entries.pop(key)
+            if name is None:
+                continue
+            procs_for_app = self.instances[name]
+            del procs_for_app[key]
+            if not procs_for_app:
+                del self.instances[name]
+                del self.published[name]
+                removed.add(name)
+            elif self.published[name] == key:
+                # The process we reported exited but the app is still running
+                next_key, next_info = next(iter(procs_for_app.items()))
+                added[name] = next_info
+                self.published[name] = next_key
+                republished.add(name)
+        return AppDiff(added, removed, republished)
+
+
+class ProcessScanner:
+    """Run process scans on a worker thread and publish the results"""
+
+    def __init__(self, scan_func, interval=None):
+        self.scan_func = scan_func
+        self.interval = interval
+        self.snapshots = queue.Queue()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run,
+            name="process-scanner",
+            daemon=True
+        )
+
+    def start(self):
+        """Start the worker thread"""
+        self._thread.start()
+
+    def stop(self):
+        """Ask the worker thread to exit after its current scan"""
+        self._stopped.set()
+        self._wake.set()
+
+    def request_scan(self):
+        """Queue a scan without blocking; repeated requests are merged"""
+        self._wake.set()
+
+    def drain(self):
+        """Return every result published since the last call, oldest first"""
+        results = []
+        while True:
+            try:
+                results.append(self.snapshots.get_nowait())
+            except queue.Empty:
+                return results
+
+    def _run(self):
+        # Scans on request, and every `interval` seconds if one is set
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            if self._stopped.is_set():
+                return
+            try:
+                snapshot = self.scan_func()
+            except Exception:
+                continue
+            self.snapshots.put(snapshot)
@@ -0,0 +1,76 @@
+import math
+import time
+
+# Display refresh rates offered in the UI, in ticks per second
+DISPLAY_RATES = {
+    '100 Hz': 100,
+    '30 Hz': 30,
+    '1 Hz': 1
+}
+
+
+class RenderScheduler:
+    """Call a render function on display-period boundaries while active
+
+    `render` draws the display and returns the elapsed seconds it showed.
+    Each tick is scheduled for the moment that value crosses into the next
+    period, so the display never drifts behind the clock. Nothing is
+    scheduled while the scheduler is stopped.
+
+    If `on_late` is given it is called with how many nanoseconds after its
+    due time each tick actually fired.
+    """
+
+    def __init__(self, root, render, rate=100, on_late=None):
+        self.root = root
+        self.render = render
+        self.on_late = on_late
+        self._due_ns = None
+        self.delivered = 0
+        self.missed = 0
+        self._after_id = None
+        self._last_slot = None
+        self.set_rate(rate)
+
+    @property
+    def active(self):
+        return self._after_id is not None
+
+    def set_rate(self, rate):
+        """Change the number of display updates per second"""
+        self.rate = rate
+        self.period = 1.0 / rate
+        self._last_slot = None
+
+    def start(self):
+        """Start ticking, if not already"""
+        if self._after_id is None:
+            self._last_slot = None
+            self._due_ns = None
+            self._tick()
+
+    def stop(self):
+        """Cancel the pending tick"""
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+
+    def stats(self):
+        """Return how many ticks were delivered and how many periods were skipped"""
+        return {'delivered': self.delivered, 'missed': self.missed}
+
+    def _tick(self):
+        if self.on_late is not None and self._due_ns is not None:
+            self.on_late(max(0, time.perf_counter_ns() - self._due_ns))
+        elapsed = self.render()
+        slot = int(elapsed // self.period)
+        if self._last_slot is not None and slot > self._last_slot + 1:
+            self.missed += slot - self._last_slot - 1
+        self._last_slot = slot
+        self.delivered += 1
+
+        # Wake up just as the displayed value rolls over to the next period
+        delay_ms = max(1, math.ceil(((slot + 1) * self.period - elapsed) * 1000))
+        if self.on_late is not None:
+            self._due_ns = time.perf_counter_ns() + delay_ms * 1_000_000
+        self._after_id = self.root.after(delay_ms, self._tick)
@@ -0,0 +1,272 @@
+import json
+import math
+import os
+import sqlite3
+import sys
+from datetime import date, timedelta
+
+from history_store import HistoryStore
+from records import Session, parse_start_time
+from timing import NS_PER_SECOND
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    task TEXT NOT NULL,
+    start_time TEXT NOT NULL,
+    duration_ns INTEGER NOT NULL,
+    laps INTEGER NOT NULL DEFAULT 0,
+    extra TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_sessions_start_time ON sessions (start_time);
+CREATE TABLE IF NOT EXISTS task_totals (
+    task TEXT PRIMARY KEY,
+    count INTEGER NOT NULL,
+    total_ns INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS day_totals (
+    day TEXT PRIMARY KEY,
+    count INTEGER NOT NULL,
+    total_ns INTEGER NOT NULL
+) WITHOUT ROWID;
+"""
+# Indexes for task prefix searches and duration percentiles. Created by
+# load(), which the GUI runs in the background, since adding them to a
+# large existing database takes a while
+LOAD_INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_sessions_task_start ON sessions (task COLLATE NOCASE, start_time);
+CREATE INDEX IF NOT EXISTS idx_sessions_duration ON sessions (duration_ns);
+CREATE INDEX IF NOT EXISTS idx_sessions_task_duration ON sessions (task, duration_ns);
+"""
+# user_version of a database whose task and day totals are up to date
+TOTALS_VERSION = 1
+INSERT_SESSION = "INSERT INTO sessions (id, task, start_time, duration_ns, laps, extra) VALUES (?, ?, ?, ?, ?, ?)"
+ADD_TASK_TOTAL = (
+    "INSERT INTO task_totals (task, count, total_ns) VALUES (?, 1, ?) "
+    "ON CONFLICT (task) DO UPDATE SET count = count + 1, total_ns = total_ns + excluded.total_ns"
+)
+ADD_DAY_TOTAL = (
+    "INSERT INTO day_totals (day, count, total_ns) VALUES (substr(?, 1, 10), 1, ?) "
+    "ON CONFLICT (day) DO UPDATE SET count = count + 1, total_ns = total_ns + excluded.total_ns"
+)
+
+
+class SqliteHistoryStore(HistoryStore):
+    """Session history in an indexed SQLite database
+
+    Nothing is loaded into memory up front: pages of sessions are answered
+    by queries, so startup cost doesn't grow with the history. Counts and
+    totals come from task_totals and day_totals, which every insert keeps
+    up to date.
+    """
+
+    def __init__(self, path, legacy_path=None):
+        self.path = path
+        self.legacy_path = legacy_path
+        self._is_new = not os.path.exists(path)
+        # The GUI loads history on a worker thread and then uses the store
+        # from the Tk thread; it's never used from two threads at once
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+        if self._is_new:
+            self.db.execute(f"PRAGMA user_version={TOTALS_VERSION}")
+        # Writes go through their own connection, which may belong to a
+        # writer thread; with WAL, queries on self.db don't block on them
+        self._write_db = None
+
+    def load(self):
+        # Queries run on demand; only indexes and, for a database from
+        # before the totals tables, the totals may need building
+        self.import_legacy()
+        self.db.executescript(LOAD_INDEXES)
+        if self.db.execute("PRAGMA user_version").fetchone()[0] < TOTALS_VERSION:
+            with self.db:
+                self.db.execute("DELETE FROM task_totals")
+                self.db.execute(
+                    "INSERT INTO task_totals (task, count, total_ns) "
+                    "SELECT task, COUNT(*), SUM(duration_ns) FROM sessions GROUP BY task"
+                )
+                self.db.execute("DELETE FROM day_totals")
+                self.db.execute(
+                    "INSERT INTO day_totals (day, count, total_ns) "
+                    "SELECT substr(start_time, 1, 10), COUNT(*), SUM(duration_ns) FROM sessions "
+                    "GROUP BY substr(start_time, 1, 10)"
+                )
+                self.db.execute(f"PRAGMA user_version={TOTALS_VERSION}")
+
+    def write(self, sessions):
+        db = self._writer()
+        with db:
+            insert(db, sessions)
+
+    def erase(self):
+        db = self._writer()
+        with db:
+            db.execute("DELETE FROM sessions")
+            db.execute("DELETE FROM task_totals")
+            db.execute("DELETE FROM day_totals")
+        db.execute("VACUUM")
+
+    def close(self):
+        if self._write_db is not None:
+            self._write_db.close()
+            self._write_db = None
+        self.db.close()
+
+    def _writer(self):
+        if self._write_db is None:
+            self._write_db = sqlite3.connect(self.path, check_same_thread=False)
+            self._write_db.execute("PRAGMA synchronous=NORMAL")
+        return self._write_db
+
+    def prepend(self, sessions):
+        known = set(self.db.execute("SELECT task, start_time, duration_ns FROM sessions"))
+        sessions = [s for s in sessions if (s.task, s.start_time, s.duration_ns) not in known]
+        # Sessions are listed by id, so these get ids below the stored ones
+        first = self.db.execute("SELECT COALESCE(MIN(id), 1) FROM sessions").fetchone()[0]
+        with self.db:
+            insert(self.db, sessions, first - len(sessions))
+
+    def iter_sessions(self):
+        rows = self.db.execute(
+            "SELECT task, start_time, duration_ns, laps, extra FROM sessions ORDER BY id"
+        )
+        for row in rows:
+            yield from_row(row)
+
+    def count(self):
+        return self.db.execute("SELECT COALESCE(SUM(count), 0) FROM task_totals").fetchone()[0]
+
+    def total_duration(self):
+        total_ns = self.db.execute("SELECT COALESCE(SUM(total_ns), 0) FROM task_totals").fetchone()[0]
+        return total_ns / NS_PER_SECOND
+
+    def sessions(self, offset=0, limit=None):
+        rows = self.db.execute(
+            "SELECT task, start_time, duration_ns, laps, extra FROM sessions "
+            "ORDER BY id DESC LIMIT ? OFFSET ?",
+            (-1 if limit is None else limit, offset)
+        )
+        return [from_row(row) for row in rows]
+
+    def totals_by_task(self, limit=None):
+        rows = self.db.execute(
+            "SELECT task, count, total_ns FROM task_totals ORDER BY total_ns DESC LIMIT ?",
+            (-1 if limit is None else limit,)
+        )
+        return [(task, count, total_ns / NS_PER_SECOND) for task, count, total_ns in rows]
+
+    def totals_by_day(self, limit=None):
+        rows = self.db.execute(
+            "SELECT day, count, total_ns FROM day_totals ORDER BY day DESC LIMIT ?",
+            (-1 if limit is None else limit,)
+        )
+        return [(day, count, total_ns / NS_PER_SECOND) for day, count, total_ns in rows]
+
+    def percentile(self, p, task=None):
+        # Counted from the totals, then read off a duration index
+        where, params = ("WHERE task = ?", (task,)) if task is not None else ("", ())
+        count = self.db.execute(
+            f"SELECT COALESCE(SUM(count), 0) FROM task_totals {where}", params).fetchone()[0]
+        if not count:
+            return 0.0
+        rank = min(count, max(1, math.ceil(p / 100 * count)))
+        duration_ns = self.db.execute(
+            f"SELECT duration_ns FROM sessions {where} ORDER BY duration_ns LIMIT 1 OFFSET ?",
+            params + (rank - 1,)
+        ).fetchone()[0]
+        return duration_ns / NS_PER_SECOND
+
+    def search(self, task_prefix='', first_day=None, last_day=None):
+        """Answered by range queries on the task or start time index"""
+        clauses, params = [], []
+        if task_prefix:
+            clauses.append("task COLLATE NOCASE >= ? AND task COLLATE NOCASE < ?")
+            params += [task_prefix, task_prefix + '\U0010ffff']
+        if first_day:
+            clauses.append("start_time >= ?")
+            params.append(first_day)
+        if last_day:
+            clauses.append("start_time < ?")
+            params.append((date.fromisoformat(last_day) + timedelta(days=1)).isoformat())
+        span = None
+        if task_prefix and (first_day or last_day):
+            span = self.db.execute(
+                "SELECT COALESCE(SUM(count), 0) FROM day_totals WHERE day >= ? AND day <= ?",
+                (first_day or '', last_day or '\U0010ffff')
+            ).fetchone()[0]
+        elif task_prefix:
+            span = self.count()
+        return SqliteSearchResult(self.db, " AND ".join(clauses) or "1", tuple(params), span)
+
+
+class SqliteSearchResult:
+    """Sessions found by SqliteHistoryStore.search, queried a page at a time
+
+    `span` is how many sessions fall in the searched days when a task
+    prefix is given, else None.
+    """
+
+    def __init__(self, db, where, params, span=None):
+        self.db = db
+        self.where = where
+        self.params = params
+        self.span = span
+        self._count = None
+
+    def count(self):
+        if self._count is None:
+            self._count = self.db.execute(
+                f"SELECT COUNT(*) FROM sessions WHERE {self.where}", self.params).fetchone()[0]
+        return self._count
+
+    def sessions(self, offset=0, limit=None):
+        count = self.count()
+        if offset >= count:
+            return []
+        end = count if limit is None else min(count, offset + limit)
+        # Walking the start time index newest first reads about span / count
+        # sessions per match it returns, and stops after the page. The task
+        # index reads only the matches, but all of them, to sort them
+        if self.span is not None and count * count < end * self.span:
+            index = "idx_sessions_task_start"
+        else:
+            index = "idx_sessions_start_time"
+        rows = self.db.execute(
+            "SELECT task, start_time, duration_ns, laps, extra FROM sessions "
+            f"INDEXED BY {index} WHERE {self.where} "
+            "ORDER BY start_time DESC, id DESC LIMIT ? OFFSET ?",
+            self.params + (-1 if limit is None else limit, offset)
+        )
+        return [from_row(row) for row in rows]
+
+
+def insert(db, sessions, first_id=None):
+    """Insert sessions and add them to the totals, inside the caller's transaction
+
+    Ids are assigned by SQLite, or count up from `first_id`.
+    """
+    ids = [None] * len(sessions) if first_id is None else range(first_id, first_id + len(sessions))
+    db.executemany(INSERT_SESSION, ((session_id,) + to_row(session) for session_id, session in zip(ids, sessions)))
+    db.executemany(ADD_TASK_TOTAL, ((session.task, session.duration_ns) for session in sessions))
+    db.executemany(ADD_DAY_TOTAL, ((session.start_time, session.duration_ns) for session in sessions))
+
+
+def to_row(session):
+    """Split a Session into column values"""
+    return (
+        session.task,
+        session.start_time,
+        session.duration_ns,
+        session.laps,
+        json.dumps(session.extra) if session.extra else None
+    )
+
+
+def from_row(row):
+    """Rebuild a Session from column values"""
+    task, start_time, duration_ns, laps, extra = row
+    return Session(sys.intern(task), parse_start_time(start_time), duration_ns, laps,
+                   json.loads(extra) if extra else None)
@@ -1,32 +1,87 @@
+import threading
 import tkinter as tk
 from tkinter import ttk, messagebox
-import time
-import psutil
 from datetime import datetime
-import json
-import os
+from scanner import AppDiff, ProcessCache, ProcessScanner
+from classifier import AppClassifier
+from discovery import get_backend
+from scheduler import DISPLAY_RATES, RenderScheduler
+from timing import NS_PER_SECOND, TimeFormatter, TimingEngine, format_many, format_ns, format_time
+from history_store import build_session, open_history_store
+from history_view import VirtualListView
+from sampler import ResourceSampler
+from timers import TimerRegistry
+from lapfile import LapStore, finish
+from autotrack import AutoTracker
+from metrics import LagMonitor, Metrics
+from metrics_view import ProfilerWindow
+from history_writer import HistoryWriter
+from records import parse_day
+import checkpoint
+
+# Seconds between background process scans. An app the scans notice has
+# been launched at most one interval earlier; a process older than
+# LAUNCH_AGE_LIMIT was already running (e.g. when the stopwatch started),
+# so its timer isn't backdated to its launch
+SCAN_INTERVAL = 3.0
+LAUNCH_AGE_LIMIT = 2 * SCAN_INTERVAL
+
+# Timed when profiling is on (STOPWATCH_PROFILE)
+PROFILED_METHODS = (
+    'update_time', 'update_timers', 'poll_scanner', 'get_running_apps',
+    'highlight_laps', 'save_history', 'show_history', 'history_rows'
+)
 
 class StopwatchGUI:
     def __init__(self, root):
         self.root = root
         self.root.title("Task Stopwatch")
-        self.root.geometry("700x700")
+        self.root.geometry("700x880")
         self.root.configure(bg='#1a1a1a')
         self.root.resizable(False, False)
         
-        # Stopwatch state
-        self.running = False
-        self.start_time = 0
-        self.elapsed_time = 0
-        self.lap_times = []
-        self.lap_count = 0
+        # Profiling wraps the hot paths before any of them are handed to
+        # Tk, threads or schedulers; when it is off nothing is wrapped
+        self.metrics = Metrics.from_environment()
+        if self.metrics:
+            self.metrics.instrument(self, PROFILED_METHODS)
+        
+        # Stopwatch state lives in the timing engine; the GUI only displays it
+        self.timer = TimingEngine()
+        self.time_formatter = TimeFormatter()
+        self.displayed_time = None
+        self.highlighted_laps = (None, None)  # (fastest, slowest) rows
         
         # Task tracking
         self.selected_task = None
         self.task_start_time = None
-        self.session_history = []
-        self.history_file = "task_history.json"
-        self.load_history()
+        
+        # Resource usage of the tracked app is sampled while the timer runs
+        self.sampler = None
+        self.sample_interval = 2.0
+        # Use a .db file name to keep history in SQLite instead
+        self.history_file = "task_history.jsonl"
+        # History is loaded on a background thread after the window shows;
+        # sessions finished before then, and disk work queued behind them,
+        # wait in pending_sessions
+        self.history = open_history_store(self.history_file)
+        self.history_ready = False
+        self.history_error = None
+        self.history_loaded = threading.Event()
+        self.pending_sessions = []
+        # Sessions are written by a background thread, in batches
+        self.history_writer = HistoryWriter(
+            self.history, latency=self.metrics.histogram('history_write_latency') if self.metrics else None)
+        # Laps are streamed to a small binary file per session
+        self.lap_store = LapStore.for_history(self.history_file, run=self.after_history_writes)
+        # The running session is checkpointed so a crash doesn't lose it; one
+        # left unfinished last time is offered back once the window shows
+        self.checkpoint_file = self.open_checkpoint("task_checkpoint.bin")
+        self.unfinished = self.checkpoint_file.read() if self.checkpoint_file else None
+        self.checkpoint_after = None
+        
+        # Extra per-app timers that run alongside the main stopwatch
+        self.timers = TimerRegistry(lap_store=self.lap_store)
         
         # Common applications and keywords
         self.app_keywords = [
@@ -57,54 +112,238 @@ class StopwatchGUI:
             'python', 'pythonw'  # Exclude Python to avoid showing the stopwatch itself
         ]
         
+        # Platform-specific process listing (psutil on Windows, /proc on Linux)
+        self.discovery = get_backend()
+        
+        # Keyword/path matching is compiled once and memoized per name
+        self.classifier = AppClassifier(
+            self.app_keywords,
+            self.excluded_processes + self.discovery.excluded_processes,
+            self.discovery.system_paths,
+            self.discovery.app_paths
+        )
+        
+        # Process scans run off the Tk thread and only classify new PIDs;
+        # the resulting diffs are polled with after()
+        self.running_apps = {}
+        self.process_cache = ProcessCache(self.classify_process)
+        self.scanner = ProcessScanner(self.get_running_apps, interval=SCAN_INTERVAL)
+        
+        # Watched apps get a background timer when they launch and are
+        # stopped when their process exits
+        self.autotracker = AutoTracker(self.discovery.is_alive, self.is_priority_app, clock=self.timers.clock,
+                                       instances=self.process_cache.instances_of)
+        
         self.setup_ui()
+        
+        # The display only ticks while the stopwatch is running
+        self.render_scheduler = RenderScheduler(self.root, self.update_time, on_late=self.metric('after_late.display'))
+        # One shared tick refreshes every background timer
+        self.timers_scheduler = RenderScheduler(self.root, self.update_timers, rate=10, on_late=self.metric('after_late.timers'))
         self.update_time()
-        self.update_running_apps()
         
-    def load_history(self):
-        """Load task history from file"""
-        if os.path.exists(self.history_file):
+        # Everything slow (history load, process scans) starts once the
+        # window is up, so launch time doesn't grow with either
+        self.root.after_idle(self.start_background_work)
+        # Closing the window first writes out any queued sessions
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        
+        if self.metrics:
+            self.lag_monitor = LagMonitor(self.root, self.metrics.recorder('event_loop_lag'))
+            self.lag_monitor.start()
+            self.root.bind('<F12>', lambda event: ProfilerWindow(self.root, self.metrics))
+            self.root.bind('<Destroy>', self.on_destroy)
+    
+    def metric(self, name):
+        """Recorder for one histogram, or None when profiling is off"""
+        return self.metrics.recorder(name) if self.metrics else None
+    
+    def on_destroy(self, event):
+        """Write the profiling metrics when the main window closes"""
+        if event.widget is self.root:
             try:
-                with open(self.history_file, 'r') as f:
-                    self.session_history = json.load(f)
-            except:
-                self.session_history = []
+                self.metrics.dump()
+            except OSError:
+                pass
+        
+    def start_background_work(self):
+        """Second startup stage: load history and scan processes off the Tk thread"""
+        threading.Thread(target=self.load_history, name="history-load", daemon=True).start()
+        self.scanner.start()
+        self.autotracker.start()
+        self.update_running_apps()
+        self.poll_scanner()
+        self.poll_history_load()
+        self.offer_unfinished_session()
+    
+    def load_history(self):
+        """Load task history from the history store (runs on a worker thread)"""
+        try:
+            # Also upgrades an old task_history.json, the first time
+            self.history.load()
+        except Exception as e:
+            self.history_error = e
+        self.history_loaded.set()
+    
+    def poll_history_load(self):
+        """Hand the loaded history to the Tk thread and save any waiting sessions"""
+        if self.history_ready:
+            return
+        if not self.history_loaded.is_set():
+            self.root.after(50, self.poll_history_load)
+            return
+        self.history_ready = True
+        if self.history_error is not None:
+            messagebox.showerror("History", f"Could not load session history:\n{self.history_error}")
+        self.history_writer.start()
+        self.poll_history_writer()
+        pending, self.pending_sessions = self.pending_sessions, []
+        for item in pending:
+            if callable(item):
+                self.history_writer.call(item)
+            else:
+                self.save_history(item)
+    
+    def poll_history_writer(self):
+        """Report errors from the history writer thread"""
+        self.show_history_errors()
+        self.root.after(500, self.poll_history_writer)
+    
+    def show_history_errors(self):
+        errors = self.history_writer.drain_errors()
+        if errors:
+            messagebox.showerror("History", f"Could not save session history:\n{errors[-1]}")
     
-    def save_history(self):
-        """Save task history to file"""
+    def on_close(self):
+        """Save running background timers, write out queued history, then close the window"""
+        if not self.history_ready:
+            # Sessions finished during startup are still waiting on the load
+            self.history_loaded.wait()
+            self.poll_history_load()
+        # Background timers aren't checkpointed, so end their sessions now
+        self.timers_scheduler.stop()
+        for session in self.timers.stop_all():
+            self.save_history(session)
+        self.history_writer.close()
+        self.show_history_errors()
+        self.root.destroy()
+    
+    def open_checkpoint(self, path):
+        """Open the checkpoint file, or return None to run without checkpoints"""
         try:
-            with open(self.history_file, 'w') as f:
-                json.dump(self.session_history, f, indent=2)
-        except:
-            pass
+            return checkpoint.CheckpointFile(path)
+        except (OSError, ValueError):
+            return None
+    
+    def after_history_writes(self, work):
+        """Run `work` on the history writer thread once the sessions saved so far are written"""
+        if not self.history_ready:
+            self.pending_sessions.append(work)
+            return
+        self.history_writer.call(work)
+    
+    def save_checkpoint(self, flush=False):
+        """Checkpoint the running stopwatch"""
+        self.checkpoint_file.write(
+            checkpoint.capture(self.timer, self.selected_task, self.task_start_time), flush)
+    
+    def checkpoint_tick(self):
+        """Periodic checkpoint, on its own after() so the display tick never waits for it"""
+        self.save_checkpoint()
+        self.checkpoint_after = self.root.after(checkpoint.INTERVAL_MS, self.checkpoint_tick)
+    
+    def start_checkpoints(self):
+        if self.checkpoint_file is None:
+            return
+        # The map is updated now; the wait for the disk happens off the Tk thread
+        self.save_checkpoint()
+        self.after_history_writes(self.checkpoint_file.flush)
+        if self.checkpoint_after is None:
+            self.checkpoint_after = self.root.after(checkpoint.INTERVAL_MS, self.checkpoint_tick)
+    
+    def stop_checkpoints(self):
+        if self.checkpoint_after is not None:
+            self.root.after_cancel(self.checkpoint_after)
+            self.checkpoint_after = None
+        if self.checkpoint_file is not None:
+            # Cleared only once the stopped session is written, and not at
+            # all if the timer has been started again by then
+            seq = self.checkpoint_file.seq
+            self.after_history_writes(lambda: self.checkpoint_file.clear(if_seq=seq))
+    
+    def offer_unfinished_session(self):
+        """Resume, save or discard a session that was running when the app last died"""
+        unfinished, self.unfinished = self.unfinished, None
+        if unfinished is None:
+            return
+        elapsed = format_ns(unfinished.elapsed_ns)
+        saved_at = datetime.fromtimestamp(unfinished.saved_at / NS_PER_SECOND).strftime("%Y-%m-%d %H:%M")
+        if unfinished.task:
+            answer = messagebox.askyesnocancel(
+                "Unfinished Session",
+                f"{unfinished.task} was still being timed when the stopwatch closed "
+                f"({elapsed} as of {saved_at}).\n\n"
+                "Yes: resume timing it\nNo: save it to history as it is\nCancel: discard it"
+            )
+        else:
+            answer = messagebox.askyesno(
+                "Unfinished Session",
+                f"The stopwatch was still running when it closed ({elapsed} as of {saved_at}).\n\n"
+                "Resume it? Otherwise it is discarded."
+            ) or None
+        
+        if answer and not self.timer.running:
+            self.selected_task = unfinished.task or None
+            self.task_start_time = datetime.fromtimestamp(unfinished.start) if unfinished.start else None
+            if unfinished.task:
+                self.task_var.set(unfinished.task)
+                self.on_task_selected()
+            checkpoint.restore(unfinished, self.timer, self.lap_store)
+            self.show_laps()
+            self.start_running()
+            return
+        if answer is None:
+            checkpoint.discard(unfinished, self.lap_store)
+        else:
+            session = checkpoint.finalize(unfinished, self.lap_store)
+            if session:
+                self.save_history(session)
+        if not self.timer.running:
+            self.stop_checkpoints()
+    
+    def save_history(self, session):
+        """Add one finished session to the history store"""
+        if not self.history_ready:
+            self.pending_sessions.append(session)
+            return
+        self.history_writer.submit(session)
     
     def get_running_apps(self):
-        """Get list of running user applications (excluding system processes)"""
-        apps = {}
+        """Get the user applications started or exited since the last scan"""
         try:
-            for proc in psutil.process_iter(['pid', 'name', 'exe', 'username']):
-                try:
-                    name = proc.info['name']
-                    if not name or not name.endswith('.exe'):
-                        continue
-                    
-                    # Remove .exe extension
-                    display_name = name[:-4]
-                    
-                    # Skip if in excluded list
-                    if display_name.lower() in self.excluded_processes:
-                        continue
-                    
-                    # Only include processes with a window or known apps
-                    # Filter out most system processes
-                    if self.is_user_app(proc, display_name):
-                        apps[display_name] = proc.info
-                        
-                except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
-                    continue
+            procs = self.discovery.processes()
+            return self.process_cache.update(procs)
         except:
+            return AppDiff({}, set())
+    
+    def classify_process(self, proc):
+        """Return the display name of a user application, or None to skip it"""
+        try:
+            display_name = self.discovery.display_name(proc.info['name'])
+            if not display_name:
+                return None
+            
+            # Skip if in excluded list
+            if self.classifier.is_excluded(display_name):
+                return None
+            
+            # Only include processes with a window or known apps
+            # Filter out most system processes
+            if self.is_user_app(proc, display_name):
+                return display_name
+        except self.discovery.process_errors:
             pass
-        return apps
+        return None
     
     def is_user_app(self, proc, app_name):
         """Check if process is a user-facing application"""
@@ -113,46 +352,16 @@ class StopwatchGUI:
             if self.is_priority_app(app_name):
                 return True
             
-            # Get the executable path
-            exe = proc.info.get('exe')
-            if not exe:
-                return False
-            
-            exe_lower = exe.lower()
-            
-            # Exclude Windows system directories
-            system_paths = [
-                'c:\\windows\\system32',
-                'c:\\windows\\syswow64',
-                'c:\\windows\\winsxs',
-                'c:\\program files\\windows',
-                'c:\\program files (x86)\\windows'
-            ]
-            
-            if any(path in exe_lower for path in system_paths):
-                return False
-            
-            # Include if in common app directories
-            app_paths = [
-                'program files',
-                'users\\',
-                'appdata',
-                'steam',
-                'epic games'
-            ]
-            
-            if any(path in exe_lower for path in app_paths):
-                return True
-            
-            return False
+            # Get the executable path (only looked up for new processes)
+            # Excludes Windows system directories, includes common app directories
+            return self.classifier.is_user_path(proc.exe())
             
         except:
             return False
     
     def is_priority_app(self, app_name):
         """Check if application is a priority/common app"""
-        app_lower = app_name.lower()
-        return any(keyword in app_lower for keyword in self.app_keywords)
+        return self.classifier.is_priority(app_name)
     
     def setup_ui(self):
         # Title
@@ -204,6 +413,33 @@ class StopwatchGUI:
         )
         refresh_btn.pack(side=tk.LEFT, padx=5)
         
+        track_btn = tk.Button(
+            select_frame,
+            text="➕ Track",
+            font=("Arial", 10, "bold"),
+            bg='#006644',
+            fg='white',
+            command=self.add_timer,
+            relief=tk.RAISED,
+            bd=2
+        )
+        track_btn.pack(side=tk.LEFT, padx=5)
+        
+        self.auto_track_var = tk.BooleanVar(value=False)
+        auto_track_check = tk.Checkbutton(
+            task_frame,
+            text="Auto-track watched apps",
+            variable=self.auto_track_var,
+            command=self.on_auto_track_toggled,
+            font=("Arial", 9),
+            fg='white',
+            bg='#1a1a1a',
+            selectcolor='#333333',
+            activebackground='#1a1a1a',
+            activeforeground='white'
+        )
+        auto_track_check.pack()
+        
         # Selected task label
         self.selected_label = tk.Label(
             task_frame,
@@ -228,6 +464,40 @@ class StopwatchGUI:
         )
         self.time_label.pack()
         
+        # Display rate selector and tick counters
+        rate_frame = tk.Frame(time_frame, bg='#2a2a2a')
+        rate_frame.pack(pady=(0, 8))
+        
+        rate_title = tk.Label(
+            rate_frame,
+            text="Display rate:",
+            font=("Arial", 9),
+            fg='#888888',
+            bg='#2a2a2a'
+        )
+        rate_title.pack(side=tk.LEFT)
+        
+        self.rate_var = tk.StringVar(value='100 Hz')
+        rate_dropdown = ttk.Combobox(
+            rate_frame,
+            textvariable=self.rate_var,
+            values=list(DISPLAY_RATES),
+            font=("Arial", 9),
+            state='readonly',
+            width=7
+        )
+        rate_dropdown.pack(side=tk.LEFT, padx=5)
+        rate_dropdown.bind('<<ComboboxSelected>>', self.on_rate_selected)
+        
+        self.tick_label = tk.Label(
+            rate_frame,
+            text="",
+            font=("Arial", 9),
+            fg='#888888',
+            bg='#2a2a2a'
+        )
+        self.tick_label.pack(side=tk.LEFT, padx=5)
+        
         # Button frame
         button_frame = tk.Frame(self.root, bg='#1a1a1a')
         button_frame.pack(pady=15)
@@ -313,6 +583,68 @@ class StopwatchGUI:
         self.lap_listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         scrollbar.config(command=self.lap_listbox.yview)
         
+        # Background timers (one per tracked app)
+        timers_frame = tk.LabelFrame(
+            self.root,
+            text="Background Timers",
+            font=("Arial", 12, "bold"),
+            fg='#ffaa00',
+            bg='#1a1a1a',
+            relief=tk.RAISED,
+            bd=2
+        )
+        timers_frame.pack(pady=5, padx=40, fill=tk.X)
+        
+        tree_frame = tk.Frame(timers_frame, bg='#1a1a1a')
+        tree_frame.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5, pady=5)
+        
+        timers_scrollbar = tk.Scrollbar(tree_frame)
+        timers_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        
+        self.timers_tree = ttk.Treeview(
+            tree_frame,
+            columns=('elapsed', 'laps'),
+            height=4,
+            yscrollcommand=timers_scrollbar.set
+        )
+        self.timers_tree.heading('#0', text="Application")
+        self.timers_tree.heading('elapsed', text="Elapsed")
+        self.timers_tree.heading('laps', text="Laps")
+        self.timers_tree.column('#0', width=250)
+        self.timers_tree.column('elapsed', width=100, anchor=tk.CENTER)
+        self.timers_tree.column('laps', width=60, anchor=tk.CENTER)
+        self.timers_tree.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        timers_scrollbar.config(command=self.timers_tree.yview)
+        
+        timer_buttons = tk.Frame(timers_frame, bg='#1a1a1a')
+        timer_buttons.pack(side=tk.LEFT, padx=5)
+        
+        timer_lap_btn = tk.Button(
+            timer_buttons,
+            text="LAP",
+            font=("Arial", 10, "bold"),
+            bg='#0066cc',
+            fg='white',
+            width=6,
+            command=self.lap_selected_timers,
+            relief=tk.RAISED,
+            bd=2
+        )
+        timer_lap_btn.pack(pady=3)
+        
+        timer_stop_btn = tk.Button(
+            timer_buttons,
+            text="STOP",
+            font=("Arial", 10, "bold"),
+            bg='#cc6600',
+            fg='white',
+            width=6,
+            command=self.stop_selected_timers,
+            relief=tk.RAISED,
+            bd=2
+        )
+        timer_stop_btn.pack(pady=3)
+        
         # History button
         history_btn = tk.Button(
             self.root,
@@ -327,14 +659,52 @@ class StopwatchGUI:
         history_btn.pack(pady=10)
     
     def update_running_apps(self):
+        """Request a background scan; the dropdown updates when it finishes"""
+        self.scanner.request_scan()
+    
+    def poll_scanner(self):
+        """Apply scan diffs published by the scanner thread"""
+        changed = False
+        for diff in self.scanner.drain():
+            for app_name in diff.removed:
+                self.running_apps.pop(app_name, None)
+            self.running_apps.update(diff.added)
+            changed = changed or bool(diff.added or diff.removed)
+            if self.auto_track_var.get():
+                for task in self.autotracker.on_diff(diff):
+                    self.start_timer(task, self.launch_age_ns(diff.added[task]))
+        for app_name, exited_ns in self.autotracker.drain():
+            if app_name in self.timers:
+                self.stop_timer(app_name, exited_ns)
+        if changed:
+            self.refresh_app_dropdown()
+        self.root.after(200, self.poll_scanner)
+    
+    def launch_age_ns(self, info):
+        """How long ago a just-detected app was launched, so its timer
+        starts then rather than at the scan; 0 if unknown or long running
+        """
+        try:
+            age = self.discovery.process_age(info)
+        except (KeyError, OSError, TypeError, ValueError):
+            return 0
+        if not 0 < age <= LAUNCH_AGE_LIMIT:
+            return 0
+        return int(age * NS_PER_SECOND)
+    
+    def on_auto_track_toggled(self):
+        """Pick up watched apps that were already running when enabled"""
+        if self.auto_track_var.get():
+            for task in self.autotracker.on_diff(AppDiff(dict(self.running_apps), set())):
+                self.start_timer(task)
+    
+    def refresh_app_dropdown(self):
         """Update the dropdown with running applications"""
-        apps = self.get_running_apps()
-        
         # Separate priority apps from other apps
         priority_apps = []
         other_apps = []
         
-        for app_name in sorted(apps.keys()):
+        for app_name in sorted(self.running_apps.keys()):
             if self.is_priority_app(app_name):
                 priority_apps.append(app_name)
             else:
@@ -358,116 +728,201 @@ class StopwatchGUI:
     
     def format_time(self, seconds):
         """Format time as HH:MM:SS.ms"""
-        hours = int(seconds // 3600)
-        minutes = int((seconds % 3600) // 60)
-        secs = int(seconds % 60)
-        milliseconds = int((seconds % 1) * 100)
-        return f"{hours:02d}:{minutes:02d}:{secs:02d}.{milliseconds:02d}"
+        return format_time(seconds)
     
     def update_time(self):
-        """Update the time display"""
-        if self.running:
-            self.elapsed_time = time.time() - self.start_time
-        
-        time_str = self.format_time(self.elapsed_time)
-        self.time_label.config(text=time_str)
+        """Update the time display and return the elapsed time shown"""
+        elapsed_ns = self.timer.elapsed_ns()
         
-        # Update every 10ms
-        self.root.after(10, self.update_time)
+        # Skip the Tk call when the visible text hasn't changed
+        time_str = self.time_formatter.format(elapsed_ns)
+        if time_str != self.displayed_time:
+            self.time_label.config(text=time_str)
+            self.displayed_time = time_str
+        return elapsed_ns / NS_PER_SECOND
+    
+    def on_rate_selected(self, event=None):
+        """Change how often the running display refreshes"""
+        self.render_scheduler.set_rate(DISPLAY_RATES[self.rate_var.get()])
+    
+    def show_tick_stats(self):
+        """Show how many display ticks were delivered and missed"""
+        stats = self.render_scheduler.stats()
+        self.tick_label.config(text=f"{stats['delivered']} ticks, {stats['missed']} missed")
     
     def start_stop(self):
         """Toggle start/stop"""
-        if not self.running:
+        if not self.timer.running:
             # Start
             selected = self.task_var.get()
             if selected:
                 self.selected_task = selected
                 self.task_start_time = datetime.now()
-            
-            self.running = True
-            self.start_time = time.time() - self.elapsed_time
-            self.start_stop_btn.config(text="STOP", bg='#cc6600', activebackground='#ff8800')
-            self.lap_btn.config(state=tk.NORMAL)
-            self.task_dropdown.config(state=tk.DISABLED)
+            self.start_running()
         else:
-            # Stop
-            self.running = False
+            # Stop (the clock is read now, not at the last display tick)
+            elapsed_ns = self.timer.stop()
+            self.render_scheduler.stop()
+            self.update_time()
+            self.show_tick_stats()
             self.start_stop_btn.config(text="START", bg='#00aa00', activebackground='#00dd00')
             self.lap_btn.config(state=tk.DISABLED)
             self.task_dropdown.config(state='readonly')
             
-            # Save session to history
-            if self.selected_task and self.elapsed_time > 0:
-                session = {
-                    'task': self.selected_task,
-                    'start_time': self.task_start_time.strftime('%Y-%m-%d %H:%M:%S'),
-                    'duration': self.elapsed_time,
-                    'duration_formatted': self.format_time(self.elapsed_time),
-                    'laps': len(self.lap_times)
-                }
-                self.session_history.append(session)
-                self.save_history()
+            # Save session to history; its laps and samples are already on disk
+            session = None
+            if self.selected_task and elapsed_ns > 0:
+                session = build_session(
+                    self.selected_task,
+                    self.task_start_time,
+                    elapsed_ns,
+                    self.timer.lap_count
+                )
+            finish(self.timer, session)
+            self.stop_sampler(session)
+            if session:
+                self.save_history(session)
+            # Only now that the session is saved is the checkpoint dropped
+            self.stop_checkpoints()
+    
+    def start_running(self):
+        """Start the stopwatch for the selected task"""
+        if self.selected_task:
+            self.lap_store.attach(self.timer, self.task_start_time)
+        self.timer.start()
+        self.render_scheduler.start()
+        self.start_checkpoints()
+        self.start_sampler()
+        self.start_stop_btn.config(text="STOP", bg='#cc6600', activebackground='#ff8800')
+        self.lap_btn.config(state=tk.NORMAL)
+        self.task_dropdown.config(state=tk.DISABLED)
+    
+    def start_sampler(self):
+        """Start sampling the tracked app's process tree, if we know its PID"""
+        info = self.running_apps.get(self.selected_task) if self.selected_task else None
+        if info and info.get('pid'):
+            path, name = self.lap_store.new_file(self.task_start_time, '.res')
+            self.sampler = ResourceSampler(info['pid'], path, name, self.sample_interval)
+            self.sampler.start()
+    
+    def stop_sampler(self, session=None):
+        """Stop sampling; a saved session gets the samples' file name"""
+        if self.sampler is None:
+            return
+        self.sampler.finish(session)
+        self.sampler = None
     
     def record_lap(self):
         """Record a lap time"""
-        if self.running:
-            self.lap_count += 1
-            lap_time = self.elapsed_time
-            
-            # Calculate split time (time since last lap)
-            if self.lap_times:
-                split_time = lap_time - self.lap_times[-1]
-            else:
-                split_time = lap_time
-            
-            self.lap_times.append(lap_time)
+        if self.timer.running:
+            # The clock is read at the click, with the split since the last lap
+            lap_ns, split_ns = self.timer.lap()
             
             # Format and display
-            lap_str = f"Lap {self.lap_count:02d}:  {self.format_time(lap_time)}  (+{self.format_time(split_time)})"
-            self.lap_listbox.insert(tk.END, lap_str)
+            self.lap_listbox.insert(tk.END, self.lap_text(self.timer.lap_count, lap_ns, split_ns))
             self.lap_listbox.see(tk.END)  # Auto-scroll to latest
             
             # Highlight fastest and slowest laps
-            if len(self.lap_times) > 1:
+            if self.timer.lap_count > 1:
                 self.highlight_laps()
     
+    def lap_text(self, number, lap_ns, split_ns):
+        return f"Lap {number:02d}:  {format_ns(lap_ns)}  (+{format_ns(split_ns)})"
+    
+    def show_laps(self):
+        """Fill the lap list from the engine, e.g. after a session is resumed"""
+        self.lap_listbox.delete(0, tk.END)
+        self.highlighted_laps = (None, None)
+        laps = self.timer.laps
+        rows = [self.lap_text(i + 1, lap_ns, lap_ns - (laps[i - 1] if i else 0)) for i, lap_ns in enumerate(laps)]
+        if rows:
+            self.lap_listbox.insert(tk.END, *rows)
+            self.lap_listbox.see(tk.END)
+        self.highlight_laps()
+    
     def highlight_laps(self):
         """Highlight fastest (green) and slowest (red) lap splits"""
-        if len(self.lap_times) < 2:
+        splits = self.timer.splits
+        if splits.count < 2:
             return
         
-        # Calculate split times
-        splits = [self.lap_times[0]]
-        for i in range(1, len(self.lap_times)):
-            splits.append(self.lap_times[i] - self.lap_times[i-1])
-        
-        fastest_idx = splits.index(min(splits))
-        slowest_idx = splits.index(max(splits))
+        # The engine tracks fastest/slowest incrementally; only touch rows that changed
+        new = (splits.fastest_index, splits.slowest_index)
+        if new == self.highlighted_laps:
+            return
         
-        # Clear previous highlights
-        for i in range(self.lap_listbox.size()):
-            self.lap_listbox.itemconfig(i, bg='#2a2a2a', fg='#ffffff')
+        # Clear highlights that moved elsewhere
+        for idx in self.highlighted_laps:
+            if idx is not None and idx not in new:
+                self.lap_listbox.itemconfig(idx, bg='#2a2a2a', fg='#ffffff')
         
         # Apply highlights
-        self.lap_listbox.itemconfig(fastest_idx, fg='#00ff00')
-        self.lap_listbox.itemconfig(slowest_idx, fg='#ff4444')
+        self.lap_listbox.itemconfig(new[0], fg='#00ff00')
+        self.lap_listbox.itemconfig(new[1], fg='#ff4444')
+        self.highlighted_laps = new
     
     def reset(self):
         """Reset the stopwatch"""
-        self.running = False
-        self.elapsed_time = 0
-        self.start_time = 0
-        self.lap_times = []
-        self.lap_count = 0
-        
-        self.time_label.config(text="00:00:00.00")
+        finish(self.timer, None)
+        self.timer.reset()
+        self.stop_sampler()
+        self.highlighted_laps = (None, None)
+        self.render_scheduler.stop()
+        self.stop_checkpoints()
+        self.update_time()
         self.start_stop_btn.config(text="START", bg='#00aa00', activebackground='#00dd00')
         self.lap_btn.config(state=tk.DISABLED)
         self.lap_listbox.delete(0, tk.END)
         self.task_dropdown.config(state='readonly')
     
+    def add_timer(self):
+        """Start a background timer for the app picked in the dropdown"""
+        task = self.task_var.get()
+        if task:
+            self.start_timer(task)
+    
+    def start_timer(self, task, age_ns=0):
+        """Start a background timer for one app unless it already has one"""
+        if task in self.timers:
+            return
+        self.timers.start(task, age_ns)
+        self.timers_tree.insert('', tk.END, iid=task, text=task, values=("00:00:00", 0))
+        self.timers_scheduler.start()
+    
+    def lap_selected_timers(self):
+        """Record a lap on each selected background timer"""
+        for task in self.timers_tree.selection():
+            self.timers.lap(task)
+            self.timers_tree.set(task, 'laps', self.timers.timers[task].engine.lap_count)
+    
+    def stop_selected_timers(self):
+        """Stop the selected background timers and save their sessions"""
+        for task in self.timers_tree.selection():
+            self.stop_timer(task)
+    
+    def stop_timer(self, task, stopped_at_ns=None):
+        """Stop one background timer, save its session and remove its row"""
+        self.autotracker.forget(task)
+        session = self.timers.stop(task, stopped_at_ns)
+        self.timers_tree.delete(task)
+        if session:
+            self.save_history(session)
+        if not len(self.timers):
+            self.timers_scheduler.stop()
+    
+    def update_timers(self):
+        """Shared tick for all background timers; only changed rows are redrawn"""
+        for timer, seconds in self.timers.changed():
+            minutes, secs = divmod(seconds, 60)
+            hours, minutes = divmod(minutes, 60)
+            self.timers_tree.set(timer.task, 'elapsed', f"{hours:02d}:{minutes:02d}:{secs:02d}")
+        return self.timers.clock() / NS_PER_SECOND
+    
     def show_history(self):
         """Show session history in a new window"""
+        if not self.history_ready:
+            messagebox.showinfo("History", "Session history is still loading, try again in a moment.")
+            return
         history_window = tk.Toplevel(self.root)
         history_window.title("Task Session History")
         history_window.geometry("700x500")
@@ -486,11 +941,12 @@ class StopwatchGUI:
         stats_frame = tk.Frame(history_window, bg='#2a2a2a', relief=tk.RAISED, bd=2)
         stats_frame.pack(pady=10, padx=20, fill=tk.X)
         
-        if self.session_history:
-            total_time = sum(s['duration'] for s in self.session_history)
-            total_sessions = len(self.session_history)
+        total_sessions = self.history.count()
+        if total_sessions:
+            total_time = self.history.total_duration()
             
-            stats_text = f"Total Sessions: {total_sessions}  |  Total Time: {self.format_time(total_time)}"
+            median = self.history.percentile(50)
+            stats_text = f"Total Sessions: {total_sessions}  |  Total Time: {self.format_time(total_time)}  |  Median: {self.format_time(median)}"
             stats_label = tk.Label(
                 stats_frame,
                 text=stats_text,
@@ -500,33 +956,83 @@ class StopwatchGUI:
                 pady=10
             )
             stats_label.pack()
+            
+            # Per-task and per-day breakdowns come from the store's aggregates
+            top_tasks = self.history.totals_by_task(limit=3)
+            task_lines = [
+                f"{task[:20]}: {count} sessions, {self.format_time(total)} total, "
+                f"p50 {self.format_time(self.history.percentile(50, task))}, "
+                f"p90 {self.format_time(self.history.percentile(90, task))}"
+                for task, count, total in top_tasks
+            ]
+            recent_days = self.history.totals_by_day(limit=3)
+            day_text = "  |  ".join(
+                f"{day}: {self.format_time(total)} ({count})" for day, count, total in recent_days
+            )
+            breakdown_label = tk.Label(
+                stats_frame,
+                text="\n".join(task_lines + [day_text]),
+                font=("Arial", 9),
+                fg='#888888',
+                bg='#2a2a2a',
+                justify=tk.LEFT
+            )
+            breakdown_label.pack(pady=(0, 8))
+        
+        # How the background writer is keeping up this run
+        writer = self.history_writer.stats()
+        writer_label = tk.Label(
+            stats_frame,
+            text=f"Saved {writer['written']} sessions in {writer['batches']} writes  |  "
+                 f"latency p50 {writer['latency_p50_ms']:.1f} ms, p99 {writer['latency_p99_ms']:.1f} ms  |  "
+                 f"queued {writer['depth']} (max {writer['max_depth']})",
+            font=("Arial", 8),
+            fg='#666666',
+            bg='#2a2a2a'
+        )
+        writer_label.pack(pady=(0, 6))
+        
+        # Filters: task name prefix and an inclusive date range, answered
+        # from the store's indexes as you type
+        filter_frame = tk.Frame(history_window, bg='#1a1a1a')
+        filter_frame.pack(padx=20, fill=tk.X)
+        task_filter = tk.StringVar()
+        first_day = tk.StringVar()
+        last_day = tk.StringVar()
+        for text, var, width in (("Task:", task_filter, 20), ("From:", first_day, 11), ("To:", last_day, 11)):
+            tk.Label(filter_frame, text=text, font=("Arial", 10), fg='#ffffff', bg='#1a1a1a').pack(side=tk.LEFT, padx=(0, 4))
+            tk.Entry(
+                filter_frame,
+                textvariable=var,
+                width=width,
+                font=("Arial", 10),
+                bg='#2a2a2a',
+                fg='#ffffff',
+                insertbackground='#ffffff'
+            ).pack(side=tk.LEFT, padx=(0, 10))
+        match_label = tk.Label(filter_frame, text="", font=("Arial", 9), fg='#888888', bg='#1a1a1a')
+        match_label.pack(side=tk.RIGHT)
         
         # History list frame
         list_frame = tk.Frame(history_window, bg='#2a2a2a', relief=tk.SUNKEN, bd=2)
         list_frame.pack(pady=10, padx=20, fill=tk.BOTH, expand=True)
         
-        scrollbar = tk.Scrollbar(list_frame)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        
-        history_listbox = tk.Listbox(
+        # Only the rows on screen are fetched and formatted
+        history_view = VirtualListView(
             list_frame,
+            self.history_rows,
+            total_sessions,
+            placeholder="No task sessions recorded yet.",
             font=("Courier", 10),
             bg='#2a2a2a',
             fg='#ffffff',
-            selectbackground='#0066cc',
-            yscrollcommand=scrollbar.set
+            selectbackground='#0066cc'
         )
-        history_listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        scrollbar.config(command=history_listbox.yview)
-        
-        # Populate history
-        if self.session_history:
-            for i, session in enumerate(reversed(self.session_history), 1):
-                task_name = session.get('task', session.get('game', 'Unknown'))
-                entry = f"{i}. {session['start_time']} | {task_name[:30]:<30} | {session['duration_formatted']} | {session['laps']} laps"
-                history_listbox.insert(tk.END, entry)
-        else:
-            history_listbox.insert(tk.END, "No task sessions recorded yet.")
+        
+        def apply_filters(*args):
+            self.filter_history(history_view, match_label, task_filter.get(), first_day.get(), last_day.get())
+        for var in (task_filter, first_day, last_day):
+            var.trace_add('write', apply_filters)
         
         # Clear history button
         clear_btn = tk.Button(
@@ -541,221 +1047,53 @@ class StopwatchGUI:
         )
         clear_btn.pack(pady=15)
     
-    def clear_history(self, window):
-        """Clear session history"""
-        if messagebox.askyesno("Clear History", "Are you sure you want to clear all session history?"):
-            self.session_history = []
-            self.save_history()
-            window.destroy()
-            messagebox.showinfo("Success", "Session history cleared!")
-
-def main():
-    root = tk.Tk()
-    app = StopwatchGUI(root)
-    root.mainloop()
-
-if __name__ == "__main__":
-    main()
-        
-    def setup_ui(self):
-        # Title
-        title_label = tk.Label(
-            self.root, 
-            text="⏱️ GAMING STOPWATCH", 
-            font=("Arial", 20, "bold"),
-            fg='#00ff00',
-            bg='#1a1a1a'
-        )
-        title_label.pack(pady=20)
-        
-        # Time display frame
-        time_frame = tk.Frame(self.root, bg='#2a2a2a', relief=tk.RAISED, bd=3)
-        time_frame.pack(pady=20, padx=40, fill=tk.X)
-        
-        self.time_label = tk.Label(
-            time_frame,
-            text="00:00:00.00",
-            font=("Digital-7 Mono", 48, "bold"),
-            fg='#00ffff',
-            bg='#2a2a2a',
-            pady=20
-        )
-        self.time_label.pack()
-        
-        # Button frame
-        button_frame = tk.Frame(self.root, bg='#1a1a1a')
-        button_frame.pack(pady=20)
-        
-        # Start/Stop button
-        self.start_stop_btn = tk.Button(
-            button_frame,
-            text="START",
-            font=("Arial", 14, "bold"),
-            bg='#00aa00',
-            fg='white',
-            activebackground='#00dd00',
-            width=10,
-            height=2,
-            command=self.start_stop,
-            relief=tk.RAISED,
-            bd=3
-        )
-        self.start_stop_btn.grid(row=0, column=0, padx=10)
-        
-        # Lap button
-        self.lap_btn = tk.Button(
-            button_frame,
-            text="LAP",
-            font=("Arial", 14, "bold"),
-            bg='#0066cc',
-            fg='white',
-            activebackground='#0088ff',
-            width=10,
-            height=2,
-            command=self.record_lap,
-            relief=tk.RAISED,
-            bd=3,
-            state=tk.DISABLED
-        )
-        self.lap_btn.grid(row=0, column=1, padx=10)
-        
-        # Reset button
-        self.reset_btn = tk.Button(
-            button_frame,
-            text="RESET",
-            font=("Arial", 14, "bold"),
-            bg='#cc0000',
-            fg='white',
-            activebackground='#ff0000',
-            width=10,
-            height=2,
-            command=self.reset,
-            relief=tk.RAISED,
-            bd=3
-        )
-        self.reset_btn.grid(row=0, column=2, padx=10)
-        
-        # Lap times frame
-        lap_frame = tk.Frame(self.root, bg='#1a1a1a')
-        lap_frame.pack(pady=10, padx=40, fill=tk.BOTH, expand=True)
-        
-        lap_title = tk.Label(
-            lap_frame,
-            text="Lap Times",
-            font=("Arial", 14, "bold"),
-            fg='#ffaa00',
-            bg='#1a1a1a'
-        )
-        lap_title.pack()
-        
-        # Scrollable lap times list
-        list_frame = tk.Frame(lap_frame, bg='#2a2a2a', relief=tk.SUNKEN, bd=2)
-        list_frame.pack(fill=tk.BOTH, expand=True, pady=10)
-        
-        scrollbar = tk.Scrollbar(list_frame)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        
-        self.lap_listbox = tk.Listbox(
-            list_frame,
-            font=("Courier", 11),
-            bg='#2a2a2a',
-            fg='#ffffff',
-            selectbackground='#0066cc',
-            yscrollcommand=scrollbar.set,
-            height=8
-        )
-        self.lap_listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        scrollbar.config(command=self.lap_listbox.yview)
-        
-    def format_time(self, seconds):
-        """Format time as HH:MM:SS.ms"""
-        hours = int(seconds // 3600)
-        minutes = int((seconds % 3600) // 60)
-        secs = int(seconds % 60)
-        milliseconds = int((seconds % 1) * 100)
-        return f"{hours:02d}:{minutes:02d}:{secs:02d}.{milliseconds:02d}"
-    
-    def update_time(self):
-        """Update the time display"""
-        if self.running:
-            self.elapsed_time = time.time() - self.start_time
-        
-        time_str = self.format_time(self.elapsed_time)
-        self.time_label.config(text=time_str)
+    def filter_history(self, view, match_label, task_prefix, first_day, last_day):
+        """Show only the sessions matching the history window's filters"""
+        task_prefix = task_prefix.strip()
+        days = (first_day.strip(), last_day.strip())
+        first_day, last_day = parse_day(days[0]), parse_day(days[1])
+        if not (task_prefix or first_day or last_day):
+            view.reload(self.history_rows, self.history.count(), "No task sessions recorded yet.")
+            result = None
+        else:
+            result = self.history.search(task_prefix, first_day, last_day)
+            view.reload(lambda offset, limit: self.history_rows(offset, limit, result), result.count(),
+                        "No matching sessions.")
         
-        # Update every 10ms
-        self.root.after(10, self.update_time)
-    
-    def start_stop(self):
-        """Toggle start/stop"""
-        if not self.running:
-            # Start
-            self.running = True
-            self.start_time = time.time() - self.elapsed_time
-            self.start_stop_btn.config(text="STOP", bg='#cc6600', activebackground='#ff8800')
-            self.lap_btn.config(state=tk.NORMAL)
+        # Half-typed dates are ignored until they parse
+        if any(text and parse_day(text) is None for text in days):
+            match_label.config(text="Dates as YYYY-MM-DD")
+        elif result is not None:
+            match_label.config(text=f"{result.count()} matching")
         else:
-            # Stop
-            self.running = False
-            self.start_stop_btn.config(text="START", bg='#00aa00', activebackground='#00dd00')
-            self.lap_btn.config(state=tk.DISABLED)
+            match_label.config(text="")
     
-    def record_lap(self):
-        """Record a lap time"""
-        if self.running:
-            self.lap_count += 1
-            lap_time = self.elapsed_time
-            
-            # Calculate split time (time since last lap)
-            if self.lap_times:
-                split_time = lap_time - self.lap_times[-1]
-            else:
-                split_time = lap_time
-            
-            self.lap_times.append(lap_time)
-            
-            # Format and display
-            lap_str = f"Lap {self.lap_count:02d}:  {self.format_time(lap_time)}  (+{self.format_time(split_time)})"
-            self.lap_listbox.insert(tk.END, lap_str)
-            self.lap_listbox.see(tk.END)  # Auto-scroll to latest
-            
-            # Highlight fastest and slowest laps
-            if len(self.lap_times) > 1:
-                self.highlight_laps()
+    def history_rows(self, offset, limit, source=None):
+        """Format a page of history rows, newest first (from the store, or a search result)"""
+        sessions = (self.history if source is None else source).sessions(offset, limit)
+        durations = format_many(session.duration_ns for session in sessions)
+        return [
+            f"{i}. {session.start_time} | {session.task[:30]:<30} | {duration} | {session.laps} laps"
+            for i, (session, duration) in enumerate(zip(sessions, durations), offset + 1)
+        ]
     
-    def highlight_laps(self):
-        """Highlight fastest (green) and slowest (red) lap splits"""
-        if len(self.lap_times) < 2:
-            return
-        
-        # Calculate split times
-        splits = [self.lap_times[0]]
-        for i in range(1, len(self.lap_times)):
-            splits.append(self.lap_times[i] - self.lap_times[i-1])
-        
-        fastest_idx = splits.index(min(splits))
-        slowest_idx = splits.index(max(splits))
-        
-        # Clear previous highlights
-        for i in range(self.lap_listbox.size()):
-            self.lap_listbox.itemconfig(i, bg='#2a2a2a', fg='#ffffff')
-        
-        # Apply highlights
-        self.lap_listbox.itemconfig(fastest_idx, fg='#00ff00')
-        self.lap_listbox.itemconfig(slowest_idx, fg='#ff4444')
+    def lap_files_in_use(self):
+        """Names of the lap and resource files the running sessions are writing"""
+        engines = [self.timer] + [timer.engine for timer in self.timers.timers.values()]
+        in_use = {engine.lap_sink.name for engine in engines if engine.lap_sink is not None}
+        if self.sampler is not None:
+            in_use.add(self.sampler.name)
+        return in_use
     
-    def reset(self):
-        """Reset the stopwatch"""
-        self.running = False
-        self.elapsed_time = 0
-        self.start_time = 0
-        self.lap_times = []
-        self.lap_count = 0
-        
-        self.time_label.config(text="00:00:00.00")
-        self.start_stop_btn.config(text="START", bg='#00aa00', activebackground='#00dd00')
-        self.lap_btn.config(state=tk.DISABLED)
-        self.lap_listbox.delete(0, tk.END)
+    def clear_history(self, window):
+        """Clear session history"""
+        if messagebox.askyesno("Clear History", "Are you sure you want to clear all session history?"):
+            # Queued behind any unsaved sessions; errors show up like write errors
+            # Lap files of the sessions still running stay
+            in_use = self.lap_files_in_use()
+            self.history_writer.clear(also=lambda: self.lap_store.clear(keep=in_use))
+            window.destroy()
+            messagebox.showinfo("Success", "Session history cleared!")
 
 def main():
     root = tk.Tk()
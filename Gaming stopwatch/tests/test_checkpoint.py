@@ -0,0 +1,105 @@
+from datetime import datetime
+
+import checkpoint
+from checkpoint import MAGIC, SLOT_SIZE, Checkpoint, CheckpointFile
+from lapfile import LapStore
+from timing import TimingEngine
+
+
+def make_checkpoint(elapsed_ns, laps=0, lap_file=None):
+    return Checkpoint("Minecraft", 1_700_000_000, elapsed_ns, laps, lap_file, 1_700_000_100_000_000_000)
+
+
+def slot_offset(seq):
+    return len(MAGIC) + (seq % 2) * SLOT_SIZE
+
+
+def test_read_returns_newest_checkpoint(tmp_path):
+    path = str(tmp_path / 'checkpoint.bin')
+    f = CheckpointFile(path)
+    f.write(make_checkpoint(1_000))
+    f.write(make_checkpoint(2_000), flush=True)
+    f.close()
+
+    f = CheckpointFile(path)
+    assert f.read() == make_checkpoint(2_000)
+    f.close()
+
+
+def test_torn_write_falls_back_to_other_slot(tmp_path):
+    path = str(tmp_path / 'checkpoint.bin')
+    f = CheckpointFile(path)
+    f.write(make_checkpoint(1_000))
+    f.write(make_checkpoint(2_000), flush=True)
+    seq = f.seq
+    f.close()
+
+    # A crash halfway through the newest record leaves its CRC wrong
+    with open(path, 'r+b') as raw:
+        raw.seek(slot_offset(seq) + 20)
+        raw.write(b'\xff' * 8)
+
+    f = CheckpointFile(path)
+    assert f.read() == make_checkpoint(1_000)
+    # The next write goes after the newest sequence number still valid
+    f.write(make_checkpoint(3_000))
+    assert f.read() == make_checkpoint(3_000)
+    f.close()
+
+
+def test_both_slots_torn_reads_as_no_session(tmp_path):
+    path = str(tmp_path / 'checkpoint.bin')
+    f = CheckpointFile(path)
+    f.write(make_checkpoint(1_000))
+    f.write(make_checkpoint(2_000), flush=True)
+    f.close()
+
+    with open(path, 'r+b') as raw:
+        for seq in (1, 2):
+            raw.seek(slot_offset(seq) + 20)
+            raw.write(b'\xff' * 8)
+
+    f = CheckpointFile(path)
+    assert f.read() is None
+    f.close()
+
+
+def test_not_a_checkpoint_file_starts_empty(tmp_path):
+    path = tmp_path / 'checkpoint.bin'
+    path.write_bytes(b'something else entirely')
+    f = CheckpointFile(str(path))
+    assert f.read() is None
+    f.write(make_checkpoint(1_000))
+    assert f.read() == make_checkpoint(1_000)
+    f.close()
+
+
+def test_clear_skipped_after_newer_write(tmp_path):
+    f = CheckpointFile(str(tmp_path / 'checkpoint.bin'))
+    f.write(make_checkpoint(1_000))
+    stopped_at = f.seq
+    f.clear(if_seq=stopped_at)
+    assert f.read() is None
+
+    # Stopped, then started again before the queued clear ran
+    f.write(make_checkpoint(1_000))
+    stopped_at = f.seq
+    f.write(make_checkpoint(0))
+    f.clear(if_seq=stopped_at)
+    assert f.read() == make_checkpoint(0)
+    f.close()
+
+
+def test_finalize_takes_laps_after_last_checkpoint(tmp_path):
+    lap_store = LapStore(str(tmp_path / 'laps'))
+    engine = TimingEngine()
+    lap_store.attach(engine, datetime(2024, 1, 1))
+    engine.lap_sink.extend([1_000_000_000, 3_000_000_000, 7_000_000_000])
+    name = engine.lap_sink.name
+    engine.lap_sink.close()
+
+    # Checkpointed at 5 s; the app died after a lap at 7 s
+    session = checkpoint.finalize(make_checkpoint(5_000_000_000, 2, name), lap_store)
+    assert session.duration_ns == 7_000_000_000
+    assert session.laps == 3
+    assert session.extra == {'recovered': True, 'lap_file': name}
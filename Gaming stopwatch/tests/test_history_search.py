@@ -0,0 +1,104 @@
+import random
+
+import pytest
+
+from history_index import HistoryIndex, SearchResult
+from history_store import JsonlHistoryStore
+from records import Session, day_start
+from sqlite_store import SqliteHistoryStore
+
+TASKS = [f"Game {i}" for i in range(12)] + ["Minecraft", "minesweeper", "MINI Golf", "Valorant"]
+QUERIES = [
+    ('', None, None),
+    ('min', None, None),
+    ('game 1', None, None),
+    ('', '2024-01-03', '2024-01-05'),
+    ('M', '2024-01-02', '2024-01-02'),
+    ('zzz', None, None),
+    ('Valorant', '2030-01-01', None),
+]
+
+
+def make_sessions(count=3000, seed=5):
+    """Sessions ten minutes apart, with every seventh one started out of order"""
+    rng = random.Random(seed)
+    base = day_start('2024-01-01')
+    sessions = []
+    for i in range(count):
+        start = base + i * 600 - (rng.randint(0, 5000) if i % 7 == 0 else 0)
+        sessions.append(Session(rng.choice(TASKS), start, rng.randint(1, 10 ** 12), 0, None))
+    return sessions
+
+
+def brute_force(sessions, prefix, first_day, last_day):
+    """What a search must return: matches by start time, latest first"""
+    low = day_start(first_day) if first_day else float('-inf')
+    high = day_start(last_day, days_after=1) if last_day else float('inf')
+    matches = [
+        (session.start, position) for position, session in enumerate(sessions)
+        if session.task.casefold().startswith(prefix.casefold()) and low <= session.start < high
+    ]
+    return [(sessions[position].task, start) for start, position in sorted(matches, reverse=True)]
+
+
+def pages(count):
+    """Every way the history window pages through a result of `count` sessions"""
+    yield 0, None
+    yield 0, 100
+    yield count // 2, 100
+    yield max(0, count - 37), 100
+    yield count, 100
+
+
+@pytest.fixture(scope='module')
+def sessions():
+    return make_sessions()
+
+
+@pytest.fixture(params=['jsonl', 'sqlite'])
+def store(request, sessions, tmp_path):
+    if request.param == 'jsonl':
+        store = JsonlHistoryStore(str(tmp_path / 'history.jsonl'))
+        store.load()
+        # Half indexed by load(), half added one at a time
+        store.write(sessions[:len(sessions) // 2])
+        store.load()
+        for session in sessions[len(sessions) // 2:]:
+            store.add(session)
+    else:
+        store = SqliteHistoryStore(str(tmp_path / 'history.db'))
+        store.write(sessions)
+        store.load()
+    yield store
+    store.close()
+
+
+@pytest.mark.parametrize('prefix, first_day, last_day', QUERIES)
+def test_search_matches_brute_force(store, sessions, prefix, first_day, last_day):
+    expected = brute_force(sessions, prefix, first_day, last_day)
+    result = store.search(prefix, first_day, last_day)
+    assert result.count() == len(expected)
+    for offset, limit in pages(len(expected)):
+        end = None if limit is None else offset + limit
+        found = [(session.task, session.start) for session in result.sessions(offset, limit)]
+        assert found == expected[offset:end]
+
+
+def test_key_at_ranks_across_runs(sessions):
+    index = HistoryIndex.build(sessions)
+    result = SearchResult(sessions, index.search('m'))
+    assert len(result.runs) == 3
+    keys = sorted(key for run in result.runs for key in run)
+    for rank in [0, 1, len(keys) // 3, len(keys) - 2, len(keys) - 1]:
+        assert result.key_at(rank) == keys[rank]
+
+
+def test_index_add_keeps_runs_sorted():
+    sessions = make_sessions(500, seed=9)
+    index = HistoryIndex()
+    for position, session in enumerate(sessions):
+        index.add(session, position)
+    built = HistoryIndex.build(sessions)
+    assert index.keys == built.keys
+    assert index.by_task == built.by_task
+    assert index.names == built.names
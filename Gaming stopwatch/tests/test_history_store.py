@@ -0,0 +1,73 @@
+from history_store import JsonlHistoryStore, encode_line
+from records import Session
+
+
+def session(task, start=1_700_000_000):
+    return Session(task, start, 90_000_000_000, 2, None)
+
+
+def tasks(store):
+    """Stored tasks, oldest first"""
+    return [s.task for s in reversed(store.sessions())]
+
+
+def reopen(path):
+    store = JsonlHistoryStore(str(path))
+    store.load()
+    return store
+
+
+def test_half_written_last_line_is_skipped_then_trimmed(tmp_path):
+    path = tmp_path / 'history.jsonl'
+    path.write_bytes(encode_line(session("A")) + encode_line(session("B"))[:-9])
+
+    store = reopen(path)
+    assert tasks(store) == ["A"]
+    assert store.skipped_lines == 1
+
+    store.append(session("C"))
+    store.close()
+    store = reopen(path)
+    assert tasks(store) == ["A", "C"]
+    assert store.skipped_lines == 0
+    assert path.read_bytes().endswith(b'\n')
+
+
+def test_corrupt_middle_line_is_skipped_and_counted(tmp_path):
+    path = tmp_path / 'history.jsonl'
+    path.write_bytes(
+        encode_line(session("A")) + b'{"task": "B", "sta\x00\xff\n' + b'[1, 2]\n' + encode_line(session("C"))
+    )
+    store = reopen(path)
+    assert tasks(store) == ["A", "C"]
+    assert store.skipped_lines == 2
+
+    # Appending doesn't touch damaged lines before the last one
+    store.append(session("D"))
+    store.close()
+    store = reopen(path)
+    assert tasks(store) == ["A", "C", "D"]
+    assert store.skipped_lines == 2
+
+
+def test_complete_last_line_without_newline_is_kept(tmp_path):
+    path = tmp_path / 'history.jsonl'
+    path.write_bytes(encode_line(session("A")) + encode_line(session("B"))[:-1])
+
+    store = reopen(path)
+    store.append(session("C"))
+    store.close()
+    store = reopen(path)
+    assert tasks(store) == ["A", "B", "C"]
+    assert store.skipped_lines == 0
+
+
+def test_file_that_is_only_a_partial_line(tmp_path):
+    path = tmp_path / 'history.jsonl'
+    path.write_bytes(b'{"task": "A", "start"')
+
+    store = reopen(path)
+    assert store.count() == 0
+    store.append(session("B"))
+    store.close()
+    assert path.read_bytes() == encode_line(session("B"))
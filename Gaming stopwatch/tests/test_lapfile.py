@@ -0,0 +1,109 @@
+from datetime import datetime
+
+import pytest
+
+from lapfile import HEADER_SIZE, LAP, LapFile, LapStore, LapWriter, finish
+from records import Session
+from timing import TimingEngine
+
+
+def write_laps(path, laps, torn=b''):
+    writer = LapWriter(str(path), path.name)
+    writer.extend(laps)
+    writer.close()
+    if torn:
+        with open(path, 'ab') as f:
+            f.write(torn)
+
+
+def test_reader_ignores_partial_last_lap(tmp_path):
+    path = tmp_path / 'a.laps'
+    write_laps(path, [10, 20, 30], torn=b'\x01\x02\x03')
+    with LapFile(str(path)) as laps:
+        assert len(laps) == 3
+        assert list(laps) == [10, 20, 30]
+        assert laps[-1] == 30
+        assert list(laps.splits()) == [10, 10, 10]
+
+
+def test_reopen_truncates_partial_lap_and_appends(tmp_path):
+    path = tmp_path / 'a.laps'
+    write_laps(path, [10, 20, 30], torn=b'\x01\x02\x03')
+
+    writer = LapWriter.reopen(str(path), path.name)
+    assert writer.count == 3
+    writer.append(40)
+    writer.close()
+
+    assert path.stat().st_size == HEADER_SIZE + 4 * LAP.size
+    with LapFile(str(path)) as laps:
+        assert list(laps) == [10, 20, 30, 40]
+
+
+def test_reopen_rejects_other_files(tmp_path):
+    path = tmp_path / 'a.laps'
+    path.write_bytes(b'not laps at all')
+    with pytest.raises(ValueError):
+        LapWriter.reopen(str(path), path.name)
+
+
+def test_store_reopen_resumes_engine(tmp_path):
+    store = LapStore(str(tmp_path / 'laps'))
+    engine = TimingEngine()
+    store.attach(engine, datetime(2024, 1, 1))
+    engine.lap_sink.extend([10, 20])
+    name = engine.lap_sink.name
+    engine.lap_sink.close()
+    with open(engine.lap_sink.path, 'ab') as f:
+        f.write(b'\x05' * 5)
+
+    resumed = TimingEngine()
+    laps = store.reopen(resumed, name)
+    assert list(laps) == [10, 20]
+    resumed.lap_sink.append(35)
+    session = Session("Minecraft", 1_700_000_000, 35, 3, None)
+    finish(resumed, session)
+
+    assert session.extra == {'lap_file': name}
+    with store.open(session) as laps:
+        assert list(laps) == [10, 20, 35]
+
+
+def test_store_reopen_missing_file(tmp_path):
+    store = LapStore(str(tmp_path / 'laps'))
+    engine = TimingEngine()
+    assert store.reopen(engine, 'gone.laps') is None
+    assert engine.lap_sink is None
+
+
+def test_queued_file_work_runs_in_order(tmp_path):
+    queued = []
+    store = LapStore(str(tmp_path / 'laps'), run=queued.append)
+    engine = TimingEngine()
+    store.attach(engine, datetime(2024, 1, 1))
+    engine.lap_sink.extend([10, 20])
+    engine.lap_sink.append(30)
+    writer = engine.lap_sink
+    session = Session("Minecraft", 1_700_000_000, 30, 3, None)
+    finish(engine, session)
+
+    # Counted and named right away; nothing on disk until the queue runs
+    assert writer.count == 3
+    assert session.extra == {'lap_file': writer.name}
+    assert not (tmp_path / 'laps').exists()
+    for work in queued:
+        work()
+    with store.open(session) as laps:
+        assert list(laps) == [10, 20, 30]
+
+
+def test_queued_discard_deletes_file(tmp_path):
+    queued = []
+    store = LapStore(str(tmp_path / 'laps'), run=queued.append)
+    engine = TimingEngine()
+    store.attach(engine, datetime(2024, 1, 1))
+    engine.lap_sink.append(10)
+    finish(engine, None)
+    for work in queued:
+        work()
+    assert list((tmp_path / 'laps').iterdir()) == []
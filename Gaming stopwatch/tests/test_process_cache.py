@@ -0,0 +1,85 @@
+from types import SimpleNamespace
+
+from autotrack import AutoTracker
+from scanner import ProcessCache
+
+
+def proc(pid, name, create_time=100.0):
+    return SimpleNamespace(info={'pid': pid, 'name': name, 'create_time': create_time})
+
+
+class CountingClassifier:
+    """Names processes after their executable, skipping 'system'"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, proc):
+        self.calls += 1
+        name = proc.info['name']
+        return None if name == 'system' else name.title()
+
+
+def test_first_scan_adds_each_app_once():
+    cache = ProcessCache(CountingClassifier())
+    diff = cache.update([proc(1, 'game'), proc(2, 'game'), proc(3, 'system'), proc(4, 'editor')])
+    assert set(diff.added) == {'Game', 'Editor'}
+    assert diff.added['Game']['pid'] == 1
+    assert diff.removed == set()
+    assert len(cache.instances_of('Game')) == 2
+
+
+def test_unchanged_scan_is_empty_and_not_reclassified():
+    classify = CountingClassifier()
+    cache = ProcessCache(classify)
+    procs = [proc(1, 'game'), proc(2, 'system')]
+    cache.update(procs)
+    calls = classify.calls
+    diff = cache.update(procs)
+    assert diff.added == {} and diff.removed == set()
+    assert classify.calls == calls
+
+
+def test_app_removed_when_last_instance_exits():
+    cache = ProcessCache(CountingClassifier())
+    cache.update([proc(1, 'game'), proc(2, 'game')])
+    diff = cache.update([proc(2, 'game')])
+    assert diff.removed == set()
+    diff = cache.update([])
+    assert diff.removed == {'Game'}
+    assert cache.instances_of('Game') == []
+
+
+def test_published_instance_exit_republishes_survivor():
+    cache = ProcessCache(CountingClassifier())
+    cache.update([proc(1, 'game'), proc(2, 'game')])
+    diff = cache.update([proc(2, 'game')])
+    assert diff.added['Game']['pid'] == 2
+    assert diff.republished == {'Game'}
+    # The survivor is published now; another exit of a non-published one is quiet
+    cache.update([proc(2, 'game'), proc(3, 'game')])
+    diff = cache.update([proc(2, 'game')])
+    assert diff.added == {} and diff.removed == set()
+
+
+def test_reused_pid_is_a_new_process():
+    classify = CountingClassifier()
+    cache = ProcessCache(classify)
+    cache.update([proc(1, 'game', create_time=100.0)])
+    diff = cache.update([proc(1, 'editor', create_time=200.0)])
+    assert set(diff.added) == {'Editor'}
+    assert diff.removed == {'Game'}
+
+
+def test_republish_doesnt_restart_dismissed_timer():
+    cache = ProcessCache(CountingClassifier())
+    tracker = AutoTracker(lambda info: True, lambda name: name == 'Chrome', instances=cache.instances_of)
+    assert tracker.on_diff(cache.update([proc(1, 'chrome'), proc(2, 'chrome')])) == ['Chrome']
+
+    # The user stops the timer; then the published process exits
+    tracker.forget('Chrome')
+    assert tracker.on_diff(cache.update([proc(2, 'chrome')])) == []
+
+    # A real relaunch still starts one
+    cache.update([])
+    assert tracker.on_diff(cache.update([proc(3, 'chrome')])) == ['Chrome']
@@ -0,0 +1,86 @@
+import time
+from datetime import datetime, timedelta
+
+from history_store import build_session
+from lapfile import finish
+from timing import NS_PER_SECOND, TimingEngine
+
+
+class TrackedTimer:
+    """A stopwatch for one task, with its own laps"""
+
+    __slots__ = ('task', 'engine', 'started_at', 'shown_seconds')
+
+    def __init__(self, task, clock, age_ns=0):
+        self.task = task
+        self.engine = TimingEngine(clock)
+        self.started_at = datetime.now() - timedelta(microseconds=age_ns // 1000)
+        self.shown_seconds = -1  # whole seconds last shown, to skip unchanged redraws
+
+
+class TimerRegistry:
+    """Many independent stopwatches refreshed together from one clock read"""
+
+    def __init__(self, clock=time.perf_counter_ns, lap_store=None):
+        self.clock = clock
+        self.lap_store = lap_store  # where lap files go, if laps are kept
+        self.timers = {}  # task -> TrackedTimer, in start order
+
+    def __len__(self):
+        return len(self.timers)
+
+    def __contains__(self, task):
+        return task in self.timers
+
+    def start(self, task, age_ns=0):
+        """Start timing a task; does nothing if it's already being timed
+
+        `age_ns` backdates the start, e.g. to when an app's process was
+        launched rather than when a scan noticed it.
+        """
+        timer = self.timers.get(task)
+        if timer is None:
+            timer = self.timers[task] = TrackedTimer(task, self.clock, age_ns)
+            if self.lap_store is not None:
+                self.lap_store.attach(timer.engine, timer.started_at)
+            timer.engine.start(at=self.clock() - age_ns)
+        return timer
+
+    def lap(self, task):
+        """Record a lap on one timer; returns (lap ns, split ns)"""
+        return self.timers[task].engine.lap()
+
+    def stop(self, task, stopped_at_ns=None):
+        """Stop and remove a timer, returning its session record (or None)"""
+        timer = self.timers.pop(task, None)
+        if timer is None:
+            return None
+        engine = timer.engine
+        elapsed_ns = engine.elapsed_ns(stopped_at_ns)
+        engine.stop()
+        session = None
+        if elapsed_ns > 0:
+            session = build_session(task, timer.started_at, elapsed_ns, engine.lap_count)
+        finish(engine, session)
+        return session
+
+    def stop_all(self):
+        """Stop every timer at one clock read; returns their session records"""
+        now = self.clock()
+        sessions = [self.stop(task, now) for task in list(self.timers)]
+        return [session for session in sessions if session is not None]
+
+    def changed(self):
+        """Return (timer, whole seconds) for timers whose shown second changed
+
+        All timers share a single clock read, and a timer costs one
+        subtraction and compare per refresh unless its display has to change.
+        """
+        now = self.clock()
+        changed = []
+        for timer in self.timers.values():
+            seconds = timer.engine.elapsed_ns(now) // NS_PER_SECOND
+            if seconds != timer.shown_seconds:
+                timer.shown_seconds = seconds
+                changed.append((timer, seconds))
+        return changed
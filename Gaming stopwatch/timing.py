@@ -0,0 +1,176 @@
+import math
+import time
+from array import array
+
+NS_PER_SECOND = 1_000_000_000
+NS_PER_CENTISECOND = 10_000_000
+
+# Lookup tables for the fixed-width fields: '00'..'99' and '00:00'..'59:59'
+_DIGITS = tuple(f"{i:02d}" for i in range(100))
+_MIN_SEC = tuple(f"{m:02d}:{s:02d}" for m in range(60) for s in range(60))
+
+
+def _hours(hours):
+    return _DIGITS[hours] if hours < 100 else str(hours)
+
+
+def format_ns(ns):
+    """Format integer nanoseconds as HH:MM:SS.cc (cc = hundredths)"""
+    if ns < 0:
+        return '-' + format_ns(-ns)
+    seconds, centis = divmod(ns // NS_PER_CENTISECOND, 100)
+    hours, seconds = divmod(seconds, 3600)
+    return f"{_hours(hours)}:{_MIN_SEC[seconds]}.{_DIGITS[centis]}"
+
+
+def format_many(values_ns):
+    """Format many non-negative ns durations at once, e.g. a page of rows"""
+    digits = _DIGITS
+    min_sec = _MIN_SEC
+    return [
+        f"{digits[seconds // 3600] if seconds < 360_000 else seconds // 3600}:{min_sec[seconds % 3600]}.{digits[centis]}"
+        for seconds, centis in (divmod(ns // NS_PER_CENTISECOND, 100) for ns in values_ns)
+    ]
+
+
+def format_time(seconds):
+    """Format seconds as HH:MM:SS.cc"""
+    return format_ns(int(seconds * NS_PER_SECOND))
+
+
+class TimeFormatter:
+    """Formats a running clock, rebuilding HH:MM:SS only when it changes
+
+    Between ticks within the same second only the hundredths are looked
+    up, so a 100 Hz display does one divmod and one concatenation per tick.
+    """
+
+    __slots__ = ('_second', '_prefix')
+
+    def __init__(self):
+        self._second = None
+        self._prefix = ''
+
+    def format(self, ns):
+        if ns < 0:
+            return format_ns(ns)
+        second, rest = divmod(ns, NS_PER_SECOND)
+        if second != self._second:
+            hours, seconds = divmod(second, 3600)
+            self._prefix = f"{_hours(hours)}:{_MIN_SEC[seconds]}."
+            self._second = second
+        return self._prefix + _DIGITS[rest // NS_PER_CENTISECOND]
+
+
+class SplitStats:
+    """Running statistics over lap splits, updated in O(1) per lap"""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0  # sum of squared deviations (Welford)
+        self.fastest = None
+        self.fastest_index = None
+        self.slowest = None
+        self.slowest_index = None
+
+    def add(self, split):
+        """Fold in the next split; the first fastest/slowest wins ties"""
+        index = self.count
+        self.count += 1
+        delta = split - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (split - self.mean)
+        if self.fastest is None or split < self.fastest:
+            self.fastest = split
+            self.fastest_index = index
+        if self.slowest is None or split > self.slowest:
+            self.slowest = split
+            self.slowest_index = index
+
+    @property
+    def variance(self):
+        return self._m2 / self.count if self.count else 0.0
+
+    @property
+    def stdev(self):
+        return math.sqrt(self.variance)
+
+
+class TimingEngine:
+    """Headless stopwatch measured on a monotonic nanosecond clock
+
+    Elapsed time and laps are integers in nanoseconds. The clock is read
+    exactly when start, stop and lap happen, never from a display tick, so
+    wall-clock changes (NTP, DST) and GUI lag don't affect the result.
+
+    If `lap_sink` is set, every lap offset is also passed to its append(),
+    e.g. to stream laps to a lap file as they happen.
+    """
+
+    def __init__(self, clock=time.perf_counter_ns):
+        self.clock = clock
+        self.lap_sink = None
+        self.running = False
+        self.laps = array('q')  # lap offsets from the start, in ns
+        self.splits = SplitStats()
+        self._run_start_ns = 0
+        self._banked_ns = 0  # elapsed time from earlier start/stop runs
+
+    @property
+    def lap_count(self):
+        return len(self.laps)
+
+    def elapsed_ns(self, now=None):
+        """Elapsed time right now, or at clock reading `now`"""
+        if self.running:
+            if now is None:
+                now = self.clock()
+            return self._banked_ns + now - self._run_start_ns
+        return self._banked_ns
+
+    def elapsed(self):
+        """Elapsed time right now, in seconds"""
+        return self.elapsed_ns() / NS_PER_SECOND
+
+    def start(self, at=None):
+        """Start or resume timing, now or from an earlier clock reading `at`"""
+        if not self.running:
+            self._run_start_ns = self.clock() if at is None else at
+            self.running = True
+
+    def stop(self):
+        """Stop timing and return the total elapsed ns"""
+        if self.running:
+            now = self.clock()
+            self._banked_ns += now - self._run_start_ns
+            self.running = False
+        return self._banked_ns
+
+    def lap(self):
+        """Record a lap and return (lap offset, split since previous lap) in ns"""
+        lap_ns = self.elapsed_ns()
+        split_ns = lap_ns - self.laps[-1] if self.laps else lap_ns
+        self.laps.append(lap_ns)
+        self.splits.add(split_ns)
+        if self.lap_sink is not None:
+            self.lap_sink.append(lap_ns)
+        return lap_ns, split_ns
+
+    def reset(self):
+        """Stop and clear elapsed time and laps"""
+        self.running = False
+        self.laps = array('q')
+        self.splits = SplitStats()
+        self._run_start_ns = 0
+        self._banked_ns = 0
+
+    def restore(self, elapsed_ns, laps):
+        """Replace the state with a stopped run of `elapsed_ns` and lap offsets `laps`"""
+        self.reset()
+        self._banked_ns = elapsed_ns
+        previous = 0
+        for lap_ns in laps:
+            self.laps.append(lap_ns)
+            self.splits.add(lap_ns - previous)
+            previous = lap_ns